@@ -0,0 +1,62 @@
+"""
+Comprueba que renderizar heatmaps repetidamente no hace crecer la memoria.
+
+Simula N reruns de la pestaña de heatmaps (densidad + probabilidad de gol),
+serializando cada figura como hace Streamlit, y compara la memoria Python
+viva (tracemalloc) tras el calentamiento y al final.
+
+Uso:
+    python bench_heatmap_memory.py [--renders 1000] [--max-growth-kb 512]
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from src.data import load_shots
+from src.visuals import plot_goal_zones_heatmap, plot_shot_heatmap
+
+WARMUP_RENDERS = 50
+
+
+def render_once(df, i):
+    fig = plot_shot_heatmap(df) if i % 2 == 0 else plot_goal_zones_heatmap(df, bins=10)
+    return len(fig.to_json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default='data/sample_shots.csv')
+    parser.add_argument('--renders', type=int, default=1000)
+    parser.add_argument('--max-growth-kb', type=float, default=512)
+    args = parser.parse_args()
+
+    df = load_shots(args.csv)
+    tracemalloc.start()
+    # Cachés de plotly/pandas que se llenan una sola vez quedan fuera de la medida
+    for i in range(WARMUP_RENDERS):
+        render_once(df, i)
+    gc.collect()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    for i in range(args.renders):
+        render_once(df, i)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    growth_kb = (current - baseline) / 1024
+    print(f'Renders: {args.renders} ({elapsed / args.renders * 1000:.1f} ms/render)')
+    print(f'Memoria viva: inicio {baseline / 1024:.0f} KB · final {current / 1024:.0f} KB · pico {peak / 1024:.0f} KB')
+    print(f'Crecimiento: {growth_kb:.1f} KB (máximo permitido {args.max_growth_kb:.0f} KB)')
+    if growth_kb > args.max_growth_kb:
+        print('❌ La memoria crece entre renders')
+        return 1
+    print('✅ Sin crecimiento de memoria')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
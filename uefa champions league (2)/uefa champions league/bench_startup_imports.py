@@ -0,0 +1,111 @@
+"""
+Mide el tiempo de importación del arranque de la app (``python -X importtime``).
+
+Compara dos caminos, leídos de ``src/app.py``:
+- login: los imports de primer nivel anteriores al ``st.stop()`` de la pantalla de login
+- app: todos los imports de primer nivel (análisis y gráficos tras iniciar sesión)
+
+El camino de login no debe importar pandas, numpy, pyarrow ni plotly.express,
+y su coste por encima de importar streamlit debe quedar bajo ``--target-ms``.
+
+Uso:
+    python bench_startup_imports.py [--runs 3] [--target-ms 50]
+"""
+import argparse
+import ast
+import re
+import subprocess
+import sys
+
+APP_PATH = 'src/app.py'
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'plotly.express')
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)')
+
+
+def _stops_script(node) -> bool:
+    return any(
+        isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute) and n.func.attr == 'stop'
+        for n in ast.walk(node)
+    )
+
+
+def app_imports(app_path: str = APP_PATH):
+    """Imports de primer nivel de la app: (los anteriores al ``st.stop()`` del login, todos)."""
+    tree = ast.parse(open(app_path, encoding='utf-8').read())
+    login, everything = [], []
+    reached_stop = False
+    for node in tree.body:
+        if isinstance(node, ast.If) and _stops_script(node):
+            reached_stop = True
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        everything += names
+        if not reached_stop:
+            login += names
+    return tuple(dict.fromkeys(login)), tuple(dict.fromkeys(everything))
+
+
+def import_profile(modules) -> dict:
+    """Tiempo total de importación (ms) y módulos importados, en un intérprete nuevo."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+        capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    imported = {}
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        total_us += int(self_us)
+        if len(indent) == 1:
+            imported[name] = int(cumulative_us) / 1000
+        else:
+            imported.setdefault(name, None)
+    return {'total_ms': total_us / 1000, 'modules': imported}
+
+
+def best_of(modules, runs: int) -> dict:
+    """Perfil con menor tiempo total entre ``runs`` ejecuciones (reduce el ruido)."""
+    return min((import_profile(modules) for _ in range(runs)), key=lambda p: p['total_ms'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--target-ms', type=float, default=50,
+                        help='Coste máximo del camino de login por encima de importar streamlit')
+    args = parser.parse_args()
+
+    login_modules, app_modules = app_imports()
+    base = best_of(('streamlit',), args.runs)
+    login = best_of(login_modules, args.runs)
+    app = best_of(app_modules, args.runs)
+
+    print(f"Imports antes del login: {', '.join(login_modules)}")
+    print(f"streamlit:        {base['total_ms']:8.1f} ms")
+    print(f"camino de login:  {login['total_ms']:8.1f} ms")
+    print(f"app completa:     {app['total_ms']:8.1f} ms")
+    print('\nMódulos de primer nivel más costosos de la app completa:')
+    top = sorted(((ms, name) for name, ms in app['modules'].items() if ms is not None), reverse=True)[:8]
+    for ms, name in top:
+        print(f'  {name:30s} {ms:8.1f} ms')
+
+    heavy = [name for name in HEAVY_MODULES if name in login['modules']]
+    extra_ms = login['total_ms'] - base['total_ms']
+    print(f'\nLogin por encima de streamlit: {extra_ms:.1f} ms (objetivo {args.target_ms:.0f} ms)')
+    if heavy:
+        print(f"❌ El camino de login importa módulos pesados: {', '.join(heavy)}")
+        return 1
+    if extra_ms > args.target_ms:
+        print('❌ El camino de login supera el objetivo')
+        return 1
+    print('✅ Arranque del login dentro del objetivo')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
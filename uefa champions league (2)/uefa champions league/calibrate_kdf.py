@@ -0,0 +1,109 @@
+"""
+Calibra el coste del hash de contraseñas para esta máquina.
+
+Mide cuánto tarda una verificación (un login) con distintos costes del KDF y
+elige el mayor coste cuya latencia queda bajo ``--target-ms``. Informa de los
+logins por segundo que soporta cada núcleo con ese coste y de las variables de
+entorno que lo configuran en ``src.auth``.
+
+Uso:
+    python calibrate_kdf.py [--algorithm scrypt|pbkdf2_sha256] [--target-ms 100] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from src.auth import KDF_ALGORITHMS, SCRYPT_P, SCRYPT_R, derive_key, kdf_params
+
+PASSWORD = 'Calibracion1!'
+SALT = b'\x00' * 16
+SCRYPT_MAX_LOG2_N = 20
+PBKDF2_PROBE_ITERATIONS = 100_000
+
+
+def verify_ms(algorithm: str, params: dict, runs: int) -> float:
+    """Mediana (ms) de ``runs`` derivaciones, lo que cuesta verificar un login."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        derive_key(PASSWORD, SALT, algorithm, params)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def calibrate_scrypt(target_ms: float, runs: int, r: int = SCRYPT_R):
+    """Recorre n = 2^10, 2^11... y se queda con el mayor bajo el objetivo."""
+    rows = []
+    best = None
+    for log2_n in range(10, SCRYPT_MAX_LOG2_N + 1):
+        params = {'n': 2 ** log2_n, 'r': r, 'p': SCRYPT_P}
+        ms = verify_ms('scrypt', params, runs)
+        rows.append((params, ms))
+        if ms > target_ms:
+            break
+        best = (params, ms)
+    return best or rows[0], rows
+
+
+def calibrate_pbkdf2(target_ms: float, runs: int):
+    """El coste de PBKDF2 es lineal en iteraciones: se mide una muestra y se escala."""
+    probe = {'i': PBKDF2_PROBE_ITERATIONS}
+    probe_ms = verify_ms('pbkdf2_sha256', probe, runs)
+    iterations = max(1000, int(PBKDF2_PROBE_ITERATIONS * target_ms / probe_ms) // 1000 * 1000)
+    params = {'i': iterations}
+    return (params, verify_ms('pbkdf2_sha256', params, runs)), [(probe, probe_ms)]
+
+
+def describe(algorithm: str, params: dict) -> str:
+    if algorithm == 'scrypt':
+        memory_mb = 128 * params['r'] * params['n'] / 1024 ** 2
+        return f"n=2^{params['n'].bit_length() - 1} r={params['r']} ({memory_mb:.0f} MB por login)"
+    return f"{params['i']:,} iteraciones"
+
+
+def env_lines(algorithm: str, params: dict):
+    lines = [f'SHOTS_KDF_ALGORITHM={algorithm}']
+    if algorithm == 'scrypt':
+        lines += [f"SHOTS_KDF_SCRYPT_N={params['n']}", f"SHOTS_KDF_SCRYPT_R={params['r']}"]
+    else:
+        lines.append(f"SHOTS_KDF_PBKDF2_ITERATIONS={params['i']}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--algorithm', choices=KDF_ALGORITHMS, default='scrypt')
+    parser.add_argument('--target-ms', type=float, default=100,
+                        help='Latencia máxima de una verificación de contraseña')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.algorithm == 'scrypt':
+        (params, ms), rows = calibrate_scrypt(args.target_ms, args.runs)
+    else:
+        (params, ms), rows = calibrate_pbkdf2(args.target_ms, args.runs)
+
+    print(f'Mediciones ({args.algorithm}, mediana de {args.runs}):')
+    for row_params, row_ms in rows:
+        print(f'  {describe(args.algorithm, row_params):40s} {row_ms:8.1f} ms')
+
+    current = kdf_params(args.algorithm)
+    current_ms = verify_ms(args.algorithm, current, args.runs)
+    cores = os.cpu_count() or 1
+    per_core = 1000 / ms
+    print(f'\nConfiguración actual: {describe(args.algorithm, current)} → {current_ms:.1f} ms')
+    print(f'Recomendado (objetivo {args.target_ms:.0f} ms): {describe(args.algorithm, params)} → {ms:.1f} ms')
+    print(f'Logins por segundo: {per_core:.1f} por núcleo · ~{per_core * cores:.0f} con {cores} núcleos')
+    if args.algorithm == 'scrypt' and ms > args.target_ms:
+        # PBKDF2 se escala al objetivo; en scrypt solo ocurre si ni n=2^10 lo cumple
+        print('⚠️ Ni el coste mínimo cumple el objetivo en esta máquina')
+    print('\nVariables de entorno:')
+    for line in env_lines(args.algorithm, params):
+        print(f'  {line}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,7 +12,7 @@ PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.auth import register_user, list_all_users
+from src.auth import bulk_register_users, list_all_users
 
 def main():
     print("🔐 Creando usuarios de prueba...\n")
@@ -22,18 +22,19 @@ def main():
     email1 = "demo@example.com"
     password1 = "demo123456"
     
-    print(f"📝 Registrando usuario: {usuario1}")
-    result1 = register_user(usuario1, email1, password1)
-    print(f"   Resultado: {result1['message']}\n")
-    
     # Usuario de prueba 2
     usuario2 = "admin"
     email2 = "admin@example.com"
     password2 = "admin123456"
     
-    print(f"📝 Registrando usuario: {usuario2}")
-    result2 = register_user(usuario2, email2, password2)
-    print(f"   Resultado: {result2['message']}\n")
+    # Alta en bloque: una sola escritura del almacén de usuarios
+    result = bulk_register_users([
+        {'username': usuario1, 'email': email1, 'password': password1},
+        {'username': usuario2, 'email': email2, 'password': password2},
+    ])
+    for row in result['rows']:
+        print(f"📝 Registrando usuario: {row['username']}")
+        print(f"   Resultado: {row['message']}\n")
     
     # Listar usuarios
     print("📋 Usuarios registrados:")
@@ -0,0 +1,54 @@
+"""
+Alta masiva de usuarios desde un CSV o JSON.
+
+Valida todas las filas, hashea las contraseñas en paralelo y guarda las altas
+válidas de una sola vez. Muestra un informe por fila y, opcionalmente, lo
+guarda en CSV.
+
+Uso:
+    python import_users.py usuarios.csv [--workers 4] [--report informe.csv]
+
+Formato CSV (con cabecera):
+    username,email,password
+"""
+import argparse
+import csv
+import sys
+import time
+
+from src.auth import bulk_register_users, load_user_records
+
+
+def write_report(rows, path: str):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['row', 'username', 'success', 'message'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='CSV o JSON con username, email y password')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos para hashear contraseñas (por defecto uno por núcleo)')
+    parser.add_argument('--report', help='Guardar el informe por fila en este CSV')
+    args = parser.parse_args()
+
+    records = load_user_records(args.path)
+    print(f'📥 {len(records)} filas leídas de {args.path}')
+    start = time.perf_counter()
+    result = bulk_register_users(records, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    for entry in result['rows']:
+        if not entry['success']:
+            print(f"   ❌ fila {entry['row']} ({entry['username'] or 'sin usuario'}): {entry['message']}")
+    print(f"\n✅ {result['created']} usuarios creados · ❌ {result['failed']} filas con error · {elapsed:.1f} s")
+    if args.report:
+        write_report(result['rows'], args.report)
+        print(f'📄 Informe guardado en {args.report}')
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
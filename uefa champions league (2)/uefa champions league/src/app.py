@@ -7,21 +7,12 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+# Solo lo que necesita la pantalla de login: los módulos de análisis y
+# gráficos (pandas, numpy, plotly...) se importan tras iniciar sesión
 import streamlit as st
-import pandas as pd
-import numpy as np
-from src.data import (
-    load_shots, calculate_shooting_efficiency, identify_goal_zones,
-    compare_teams, compare_players, analyze_by_match, analyze_by_season,
-    load_stats_overrides, save_stats_overrides, get_stats_with_overrides
-)
-from src.visuals import (
-    plot_shot_scatter, plot_shot_heatmap, plot_goal_zones_heatmap,
-    plot_efficiency_comparison, plot_shots_vs_goals, plot_top_performers
-)
 from src.auth import (
     register_user, login_user, get_user_info, update_password, list_all_users, user_exists, validate_password_strength,
-    is_admin, set_user_admin
+    is_admin, set_user_admin, user_directory
 )
 from src.styles import get_custom_css
 
@@ -173,6 +164,28 @@ if not st.session_state.logged_in:
     
     st.stop()
 
+# ============ IMPORTS DE ANÁLISIS (SOLO CON SESIÓN INICIADA) ============
+from src.data import (
+    goal_zone_matrices, compare_players, analyze_by_match,
+    load_stats_overrides, save_stats_overrides, get_stats_with_overrides,
+    shots_memory_footprint, build_shot_cube, overrides_version
+)
+from src.compute import PREFETCH_EXECUTOR, get_compute_graph
+from src.figcache import FIGURES, cached_figure
+from src.filters import FilterIndex
+from src.registry import DATASETS, enable_copy_on_write, load_dataset
+from src.zones import (
+    DEFAULT_BANDWIDTH, PITCH_REGIONS, build_zone_pyramid, density_grid, density_peak, pyramid_level, region_stats,
+    zone_matrices, zones_frame
+)
+from src.visuals import (
+    plot_shot_scatter, plot_shot_heatmap, plot_goal_zones_heatmap,
+    plot_efficiency_comparison, plot_shots_vs_goals, plot_top_performers
+)
+
+# Datasets compartidos entre sesiones: cualquier escritura produce una copia propia
+enable_copy_on_write()
+
 # ============ PÁGINA PRINCIPAL (DESPUÉS DEL LOGIN) ============
 st.markdown("""
 <div style='background: linear-gradient(135deg, rgba(42,111,191,0.95) 0%, rgba(42,111,191,0.78) 100%); padding: 40px 30px; border-radius: 20px; margin-bottom: 20px; box-shadow: 0 8px 24px rgba(0, 212, 255, 0.12); animation: fadeInBubble 0.8s ease-out;'>
@@ -213,16 +226,23 @@ st.sidebar.markdown("**📂 Cargar Datos**")
 uploaded = st.sidebar.file_uploader('📥 Sube un CSV de tiros', type=['csv'])
 
 if uploaded is not None:
-    df = load_shots(uploaded)
+    dataset_key, df = load_dataset(uploaded)
     st.sidebar.success('✅ Archivo cargado correctamente')
 else:
     try:
-        df = load_shots('data/sample_shots.csv')
+        dataset_key, df = load_dataset('data/sample_shots.csv')
         st.sidebar.info('📊 Usando dataset de ejemplo (2025-2026)')
     except FileNotFoundError:
         st.error("❌ No se encontró archivo de datos. Por favor carga un CSV.")
         st.stop()
 
+# Dataset, cubo e índice se comparten entre todas las sesiones (solo lectura)
+cube = DATASETS.derived(dataset_key, 'cube', build_shot_cube, df=df)
+filter_index = DATASETS.derived(dataset_key, 'filter_index', FilterIndex.from_shots, df=df)
+
+footprint = shots_memory_footprint(df)
+st.sidebar.caption(f"💾 {len(df):,} tiros en memoria · {footprint['total_mb']:.1f} MB")
+
 # ============ OPCIONES DE USUARIO EN BARRA LATERAL ============
 st.sidebar.markdown('---')
 st.sidebar.markdown("**⚙️ Opciones de Usuario**")
@@ -277,7 +297,7 @@ st.sidebar.markdown('---')
 # ============ ESTADÍSTICAS GLOBALES ============
 st.sidebar.markdown("**📈 Estadísticas Globales**")
 # Use overrides-aware stats
-global_stats = get_stats_with_overrides(df, group_by=None)
+global_stats = get_stats_with_overrides(cube, group_by=None)
 total_shots = int(global_stats['total_shots'].iloc[0])
 total_goals = int(global_stats['goals'].iloc[0])
 global_efficiency = float(global_stats['efficiency_%'].iloc[0])
@@ -305,8 +325,8 @@ if is_admin(st.session_state.username):
         st.markdown('---')
         st.markdown('**Por Equipo (opcional)**')
         team_overrides = {}
-        teams_local = df['team'].dropna().unique().tolist() if 'team' in df.columns else []
-        for team in sorted(teams_local):
+        teams_local = filter_index.values('team')
+        for team in teams_local:
             col_a, col_b = st.columns([2, 1])
             with col_a:
                 t_goals = st.number_input(f'Goles - {team}', value=overrides.get(f'team:{team}', {}).get('goals', 0), min_value=0, key=f'goals_{team}')
@@ -329,23 +349,59 @@ else:
 st.sidebar.markdown("---")
 st.sidebar.markdown("**🔍 Filtros de Búsqueda**")
 
-seasons = df['season'].dropna().unique().tolist() if 'season' in df.columns else []
-teams = df['team'].dropna().unique().tolist() if 'team' in df.columns else []
-players = df['player'].dropna().unique().tolist() if 'player' in df.columns else []
-matches = df['match_id'].dropna().unique().tolist() if 'match_id' in df.columns else []
-
-sel_season = st.sidebar.selectbox('📅 Temporada', options=['Todas'] + sorted(seasons))
-sel_team = st.sidebar.selectbox('⚽ Equipo', options=['Todos'] + sorted(teams))
-sel_player = st.sidebar.selectbox('👤 Jugador', options=['Todos'] + sorted(players))
-
-# Aplicar filtros
-filtered = df.copy()
-if sel_season != 'Todas':
-    filtered = filtered[filtered['season'] == sel_season]
-if sel_team != 'Todos':
-    filtered = filtered[filtered['team'] == sel_team]
-if sel_player != 'Todos':
-    filtered = filtered[filtered['player'] == sel_player]
+# Opciones ya ordenadas desde el índice de filtros (sin recorrer el DataFrame)
+seasons = filter_index.values('season')
+teams = filter_index.values('team')
+players = filter_index.values('player')
+
+sel_season = st.sidebar.selectbox('📅 Temporada', options=['Todas'] + seasons)
+sel_team = st.sidebar.selectbox('⚽ Equipo', options=['Todos'] + teams)
+sel_player = st.sidebar.selectbox('👤 Jugador', options=['Todos'] + players)
+
+filter_state = {
+    'season': None if sel_season == 'Todas' else sel_season,
+    'team': None if sel_team == 'Todos' else sel_team,
+    'player': None if sel_player == 'Todos' else sel_player,
+}
+
+def _declare_products(graph):
+    """Productos analíticos compartidos por todas las pestañas."""
+    def _zone_matrices(bins=10, min_shots=1):
+        # Las resoluciones de la pirámide (5, 10, 20) salen de su nivel, sin volver a binear
+        grid = pyramid_level(graph.get('pyramid'), bins)
+        if grid is None:
+            return goal_zone_matrices(graph.get('filtered'), bins=bins, min_shots=min_shots)
+        return zone_matrices(grid, min_shots=min_shots)
+
+    # Filas filtradas (intersección de posiciones del índice): se copian una vez
+    # por estado de filtros, no en cada rerun
+    graph.declare('filtered', lambda: filter_index.apply(df, **filter_state))
+    # Las estadísticas agregadas se responden desde el cubo con los mismos filtros
+    graph.declare('filtered_cube', lambda: cube.filter(**filter_state))
+    graph.declare('stats', lambda cube, group_by=None: get_stats_with_overrides(cube, group_by=group_by),
+                  deps=('filtered_cube',))
+    graph.declare('players', lambda cube, min_shots=3: compare_players(cube, min_shots=min_shots),
+                  deps=('filtered_cube',))
+    graph.declare('matches', analyze_by_match, deps=('filtered_cube',))
+    graph.declare('zone_matrices', _zone_matrices)
+    # La tabla de zonas sale de las mismas matrices que el heatmap
+    graph.declare('zones', lambda bins=10, min_shots=1: zones_frame(
+        graph.get('zone_matrices', bins=bins, min_shots=min_shots), min_shots=min_shots
+    ))
+    graph.declare('pyramid', build_zone_pyramid, deps=('filtered',))
+    graph.declare('density', lambda shots, bandwidth=DEFAULT_BANDWIDTH: density_grid(shots, bandwidth=bandwidth),
+                  deps=('filtered',))
+
+
+# Cada producto se calcula a lo sumo una vez por (dataset, filtros, overrides)
+graph = get_compute_graph(
+    st.session_state,
+    (dataset_key, tuple(sorted(filter_state.items())), overrides_version()),
+    _declare_products,
+)
+# Contadores al empezar este render: el pie muestra solo lo de la vista actual
+stats_before_view = graph.stats()
+filtered = graph.get('filtered')
 
 # ============ TABS PRINCIPALES ============
 tabs_labels = [
@@ -359,85 +415,111 @@ tabs_labels = [
 if is_admin(st.session_state.username):
     tabs_labels.append('🔧 Admin')
 
-tabs = st.tabs(tabs_labels)
-tab_map = {label: tab for label, tab in zip(tabs_labels, tabs)}
+# Navegación por vistas: solo se ejecuta la vista activa (st.tabs ejecuta todas)
+active_view = st.radio('Vista', tabs_labels, horizontal=True, key='active_view', label_visibility='collapsed')
+
+# Productos que necesita cada vista, para precargar la siguiente en segundo plano
+VIEW_PRODUCTS = {
+    '🗺️ Mapa de Tiros': [('stats', {}), ('density', {'bandwidth': DEFAULT_BANDWIDTH})],
+    '🔥 Heatmaps': [('zone_matrices', {'bins': 10, 'min_shots': 1})],
+    '📊 Comparativas': [('stats', {'group_by': 'team'})],
+    '🎯 Análisis de Zonas': [('zones', {'bins': 10, 'min_shots': 3}), ('pyramid', {})],
+    '👥 Ranking de Jugadores': [('stats', {'group_by': 'player'})],
+    '📋 Reportes': [('stats', {}), ('stats', {'group_by': 'team'}), ('stats', {'group_by': 'player'})],
+    '🔧 Admin': [],
+}
 
 # ============ TAB 1: MAPA DE TIROS ============
-with tab_map['🗺️ Mapa de Tiros']:
+if active_view == '🗺️ Mapa de Tiros':
     st.header('Mapa de Tiros en la Cancha')
     
     col1, col2 = st.columns([3, 1])
     
-    with col1:
-        fig = plot_shot_scatter(filtered, team=None if sel_team == 'Todos' else sel_team)
-        st.plotly_chart(fig, use_container_width=True)
-    
     with col2:
         st.markdown("### Información")
-        filtered_stats = get_stats_with_overrides(filtered, group_by=None)
+        filtered_stats = graph.get('stats')
         st.write(f"**Tiros totales:** {int(filtered_stats['total_shots'].values[0]):.0f}")
         st.write(f"**Goles:** {int(filtered_stats['goals'].values[0]):.0f}")
         st.write(f"**Eficacia:** {float(filtered_stats['efficiency_%'].values[0]):.1f}%")
+        bandwidth = st.slider('Suavizado de densidad', 1.0, 10.0, DEFAULT_BANDWIDTH, 0.5, key='density_bandwidth')
+        # Densidad KDE (FFT sobre la rejilla fija), memoizada por filtros y suavizado
+        density = graph.get('density', bandwidth=bandwidth)
+        if density['shots'] > 0:
+            peak = density_peak(density)
+            st.write(f"**Zona más densa:** ({peak['x']:.0f}, {peak['y']:.0f}) · {peak['density']:.2f} tiros/celda")
+    
+    with col1:
+        fig = cached_figure(
+            graph.key, ('filtered', ('density', {'bandwidth': bandwidth})), plot_shot_scatter, filtered,
+            team=None if sel_team == 'Todos' else sel_team, bandwidth=bandwidth, density=density
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
 # ============ TAB 2: HEATMAPS ============
-with tab_map['🔥 Heatmaps']:
+if active_view == '🔥 Heatmaps':
     st.header('Análisis de Densidad de Tiros')
     
     heatmap_type = st.selectbox('Tipo de Heatmap', ['Densidad de Tiros', 'Probabilidad de Gol'])
     
     if heatmap_type == 'Densidad de Tiros':
         st.subheader('Densidad de Tiros en la Cancha')
-        fig_heat = plot_shot_heatmap(filtered, team=None if sel_team == 'Todos' else sel_team)
-        st.pyplot(fig_heat)
+        fig_heat = cached_figure(graph.key, 'filtered', plot_shot_heatmap, filtered, team=None if sel_team == 'Todos' else sel_team)
+        st.plotly_chart(fig_heat, use_container_width=True)
     else:
         st.subheader('Zonas del Campo con Mayor Probabilidad de Gol')
-        fig_goal = plot_goal_zones_heatmap(filtered, bins=10)
-        st.pyplot(fig_goal)
+        fig_goal = cached_figure(
+            graph.key, ('zone_matrices', {'bins': 10, 'min_shots': 1}), plot_goal_zones_heatmap, None,
+            bins=10, min_shots=1, matrices=graph.get('zone_matrices', bins=10, min_shots=1)
+        )
+        st.plotly_chart(fig_goal, use_container_width=True)
 
 # ============ TAB 3: COMPARATIVAS ============
-with tab_map['📊 Comparativas']:
+if active_view == '📊 Comparativas':
     st.header('Comparativa de Eficacia')
     
     compare_by = st.selectbox('Comparar por:', ['Equipo', 'Jugador', 'Temporada'])
     
     col1, col2 = st.columns(2)
     
+    # Una sola tabla agregada (con overrides) alimenta las dos gráficas
+    compare_column = {'Equipo': 'team', 'Jugador': 'player', 'Temporada': 'season'}[compare_by]
+    compare_stats = graph.get('stats', group_by=compare_column)
+    
     with col1:
         st.subheader(f'Eficacia por {compare_by}')
-        if compare_by == 'Equipo':
-            fig_eff = plot_efficiency_comparison(filtered, group_by='team')
-        elif compare_by == 'Jugador':
-            fig_eff = plot_efficiency_comparison(filtered, group_by='player')
-        else:
-            fig_eff = plot_efficiency_comparison(filtered, group_by='season')
+        fig_eff = cached_figure(
+            graph.key, ('stats', {'group_by': compare_column}), plot_efficiency_comparison, compare_stats,
+            group_by=compare_column
+        )
         st.plotly_chart(fig_eff, use_container_width=True)
     
     with col2:
         st.subheader(f'Tiros vs Goles por {compare_by}')
-        if compare_by == 'Equipo':
-            fig_vs = plot_shots_vs_goals(filtered, group_by='team')
-        elif compare_by == 'Jugador':
-            fig_vs = plot_shots_vs_goals(filtered, group_by='player')
-        else:
-            fig_vs = plot_shots_vs_goals(filtered, group_by='season')
+        fig_vs = cached_figure(
+            graph.key, ('stats', {'group_by': compare_column}), plot_shots_vs_goals, compare_stats,
+            group_by=compare_column
+        )
         st.plotly_chart(fig_vs, use_container_width=True)
 
 # ============ TAB 4: ANÁLISIS DE ZONAS ============
-with tab_map['🎯 Análisis de Zonas']:
+if active_view == '🎯 Análisis de Zonas':
     st.header('🎯 Identificación de Zonas de Gol')
     
     bins = st.slider('Precisión del análisis (número de zonas por lado)', 5, 20, 10)
     min_shots = st.slider('Mínimo de tiros en una zona', 1, 20, 3)
     
-    zones = identify_goal_zones(filtered, bins=bins, min_shots=min_shots)
+    zones = graph.get('zones', bins=bins, min_shots=min_shots)
     
     if len(zones) > 0:
         col1, col2 = st.columns([2, 1])
         
         with col1:
             st.subheader('Heatmap de Probabilidad de Gol')
-            fig_zones = plot_goal_zones_heatmap(filtered, bins=bins)
-            st.pyplot(fig_zones)
+            fig_zones = cached_figure(
+                graph.key, ('zone_matrices', {'bins': bins, 'min_shots': min_shots}), plot_goal_zones_heatmap, None,
+                bins=bins, min_shots=min_shots, matrices=graph.get('zone_matrices', bins=bins, min_shots=min_shots)
+            )
+            st.plotly_chart(fig_zones, use_container_width=True)
         
         with col2:
             st.subheader('Mejores Zonas')
@@ -446,21 +528,53 @@ with tab_map['🎯 Análisis de Zonas']:
     else:
         st.warning('No hay datos suficientes para analizar zonas.')
 
+    st.markdown('---')
+    st.subheader('📐 Conversión por Región del Campo')
+    region_labels = {
+        'area': 'Área grande',
+        'area_chica': 'Área chica',
+        'zona_14': 'Zona 14',
+        'carril_interior_superior': 'Carril interior superior',
+        'carril_interior_inferior': 'Carril interior inferior',
+        'ultimo_tercio': 'Último tercio',
+        'custom': 'Personalizada',
+    }
+    region_name = st.selectbox('Región', list(PITCH_REGIONS) + ['custom'],
+                               format_func=lambda name: region_labels.get(name, name), key='region_select')
+    if region_name == 'custom':
+        x_range = st.slider('Rango X', 0.0, 100.0, (70.0, 100.0), step=2.5, key='region_x')
+        y_range = st.slider('Rango Y', 0.0, 100.0, (20.0, 80.0), step=2.5, key='region_y')
+        region_rect = (x_range[0], x_range[1], y_range[0], y_range[1])
+    else:
+        region_rect = PITCH_REGIONS[region_name]
+
+    # Pirámide de rejillas + tablas de suma: cada consulta de región es O(1)
+    pyramid = graph.get('pyramid')
+    region = region_stats(pyramid, *region_rect)
+    col_r1, col_r2, col_r3 = st.columns(3)
+    col_r1.metric('Tiros en la región', region['shots'])
+    col_r2.metric('Goles en la región', region['goals'])
+    col_r3.metric('Conversión', f"{region['goal_probability_%']:.1f}%")
+    x0, x1, y0, y1 = region['bounds']
+    st.caption(f'Rectángulo evaluado: x {x0:.1f}-{x1:.1f}, y {y0:.1f}-{y1:.1f}')
+
 # ============ TAB 5: RANKING DE JUGADORES ============
-with tab_map['👥 Ranking de Jugadores']:
+if active_view == '👥 Ranking de Jugadores':
     st.header('👥 Ranking de Jugadores')
     
     col1, col2 = st.columns(2)
+    players_stats = graph.get('stats', group_by='player')
     
     with col1:
         st.subheader('Top Jugadores por Goles')
-        fig_goals = plot_top_performers(filtered, metric='goals', top_n=10)
+        fig_goals = cached_figure(
+            graph.key, ('stats', {'group_by': 'player'}), plot_top_performers, players_stats, metric='goals', top_n=10
+        )
         st.plotly_chart(fig_goals, use_container_width=True)
     
     with col2:
         st.subheader('Top Jugadores por Eficacia')
-        efficiency_players = get_stats_with_overrides(filtered, group_by='player')
-        efficiency_players = efficiency_players[efficiency_players['total_shots'] >= 3]  # Mínimo 3 tiros
+        efficiency_players = players_stats[players_stats['total_shots'] >= 3]  # Mínimo 3 tiros
         top_efficient = efficiency_players.nlargest(10, 'efficiency_%')
         
         import plotly.express as px
@@ -479,11 +593,10 @@ with tab_map['👥 Ranking de Jugadores']:
         st.plotly_chart(fig_eff_players, use_container_width=True)
     
     st.subheader('📊 Tabla Completa de Jugadores')
-    players_stats = get_stats_with_overrides(filtered, group_by='player')
     st.dataframe(players_stats.style.format({'efficiency_%': '{:.2f}%'}), use_container_width=True)
 
 # ============ TAB 6: REPORTES Y RECOMENDACIONES ============
-with tab_map['📋 Reportes']:
+if active_view == '📋 Reportes':
     st.header('📋 Reportes y Recomendaciones')
     
     report_section = st.selectbox('Tipo de Reporte', [
@@ -499,7 +612,7 @@ with tab_map['📋 Reportes']:
         
         col1, col2, col3, col4 = st.columns(4)
         
-        stats = get_stats_with_overrides(filtered, group_by=None)
+        stats = graph.get('stats')
         col1.metric('Total Tiros', int(stats['total_shots'].values[0]))
         col2.metric('Total Goles', int(stats['goals'].values[0]))
         col3.metric('Eficacia Global', f"{float(stats['efficiency_%'].values[0]):.1f}%")
@@ -511,7 +624,7 @@ with tab_map['📋 Reportes']:
         
         with col1:
             st.markdown("### Equipo Más Efectivo")
-            teams_stats = get_stats_with_overrides(filtered, group_by='team')
+            teams_stats = graph.get('stats', group_by='team')
             if len(teams_stats) > 0:
                 best_team = teams_stats.nlargest(1, 'efficiency_%').iloc[0]
                 st.write(f"**{best_team['team']}**")
@@ -520,7 +633,7 @@ with tab_map['📋 Reportes']:
         
         with col2:
             st.markdown("### Jugador Más Efectivo")
-            players_stats = get_stats_with_overrides(filtered, group_by='player')
+            players_stats = graph.get('stats', group_by='player')
             players_stats = players_stats[players_stats['total_shots'] >= 2]
             if len(players_stats) > 0:
                 best_player = players_stats.nlargest(1, 'efficiency_%').iloc[0]
@@ -530,23 +643,26 @@ with tab_map['📋 Reportes']:
     
     elif report_section == 'Equipos':
         st.subheader('Análisis por Equipo')
-        teams_stats = compare_teams(filtered)
+        # Misma tabla (con overrides) que Comparativas: la gráfica coincide con la tabla
+        teams_stats = graph.get('stats', group_by='team')
         st.dataframe(teams_stats.style.format({'efficiency_%': '{:.2f}%'}), use_container_width=True)
         
         st.markdown("### Visualización")
-        fig = plot_efficiency_comparison(filtered, group_by='team')
+        fig = cached_figure(
+            graph.key, ('stats', {'group_by': 'team'}), plot_efficiency_comparison, teams_stats, group_by='team'
+        )
         st.plotly_chart(fig, use_container_width=True)
     
     elif report_section == 'Jugadores':
         st.subheader('Análisis por Jugador')
         min_shots_player = st.slider('Mínimo de tiros', 1, 20, 3)
-        players_stats = compare_players(filtered, min_shots=min_shots_player)
+        players_stats = graph.get('players', min_shots=min_shots_player)
         st.dataframe(players_stats.style.format({'efficiency_%': '{:.2f}%'}), use_container_width=True)
     
     elif report_section == 'Análisis de Partidos':
         st.subheader('Análisis por Partido')
         if 'match_id' in filtered.columns:
-            matches_stats = analyze_by_match(filtered)
+            matches_stats = graph.get('matches')
             st.dataframe(matches_stats.style.format({'efficiency_%': '{:.2f}%'}), use_container_width=True)
         else:
             st.info('No hay información de partidos en los datos.')
@@ -555,7 +671,7 @@ with tab_map['📋 Reportes']:
         st.subheader('💡 Recomendaciones Basadas en Datos')
         
         # Análisis de zonas para recomendaciones
-        zones = identify_goal_zones(filtered, bins=10, min_shots=2)
+        zones = graph.get('zones', bins=10, min_shots=2)
         
         if len(zones) > 0:
             st.markdown("### 🎯 Zonas de Mayor Éxito")
@@ -566,7 +682,7 @@ with tab_map['📋 Reportes']:
         
         st.markdown("### 📊 Estrategias Recomendadas")
         
-        teams_stats = get_stats_with_overrides(filtered, group_by='team')
+        teams_stats = graph.get('stats', group_by='team')
         if len(teams_stats) > 0:
             best_team = teams_stats.nlargest(1, 'efficiency_%').iloc[0]
             worst_team = teams_stats.nsmallest(1, 'efficiency_%').iloc[0]
@@ -577,7 +693,7 @@ with tab_map['📋 Reportes']:
                     f"Eficacia actual: {worst_team['efficiency_%']:.1f}%")
         
         st.markdown("### 👥 Jugadores Clave")
-        players_stats = get_stats_with_overrides(filtered, group_by='player')
+        players_stats = graph.get('stats', group_by='player')
         players_stats = players_stats[players_stats['total_shots'] >= 2]
         if len(players_stats) > 0:
             top_3_players = players_stats.nlargest(3, 'goals')
@@ -594,179 +710,215 @@ with tab_map['📋 Reportes']:
         """)
 
 # ============ TAB: ADMIN (solo admins) ============
-if is_admin(st.session_state.username):
-    with tab_map.get('🔧 Admin'):
-        # Header vibrante
-        st.markdown("""
-        <div style='background: linear-gradient(135deg, #020024 0%, #2b2f97 50%, #1a4d7a 100%); 
-                    padding: 30px 25px; border-radius: 15px; color: white; 
-                    box-shadow: 0 10px 30px rgba(0, 212, 255, 0.15); margin-bottom: 25px;'>
-            <div style='display: flex; align-items: center; gap: 15px;'>
-                <div style='font-size: 2.5em;'>🔧</div>
-                <div>
-                    <h1 style='margin: 0; font-size: 2em; text-shadow: 0 2px 8px rgba(0,0,0,0.3);'>Panel de Administrador</h1>
-                    <p style='margin: 8px 0 0 0; color: #a8d5ff; font-size: 1em;'>⚡ Gestiona usuarios, permisos y configuración del sistema</p>
-                </div>
+if active_view == '🔧 Admin' and is_admin(st.session_state.username):
+    # Header vibrante
+    st.markdown("""
+    <div style='background: linear-gradient(135deg, #020024 0%, #2b2f97 50%, #1a4d7a 100%); 
+                padding: 30px 25px; border-radius: 15px; color: white; 
+                box-shadow: 0 10px 30px rgba(0, 212, 255, 0.15); margin-bottom: 25px;'>
+        <div style='display: flex; align-items: center; gap: 15px;'>
+            <div style='font-size: 2.5em;'>🔧</div>
+            <div>
+                <h1 style='margin: 0; font-size: 2em; text-shadow: 0 2px 8px rgba(0,0,0,0.3);'>Panel de Administrador</h1>
+                <p style='margin: 8px 0 0 0; color: #a8d5ff; font-size: 1em;'>⚡ Gestiona usuarios, permisos y configuración del sistema</p>
             </div>
         </div>
-        """, unsafe_allow_html=True)
+    </div>
+    """, unsafe_allow_html=True)
 
-        # Tabs para Admin: Usuarios | Overrides
-        admin_tab1, admin_tab2 = st.tabs(['👥 Gestión de Usuarios', '⚙️ Overrides y Utilidades'])
+    # Tabs para Admin: Usuarios | Overrides
+    admin_tab1, admin_tab2 = st.tabs(['👥 Gestión de Usuarios', '⚙️ Overrides y Utilidades'])
 
-        # ============ PESTAÑA 1: USUARIOS ============
-        with admin_tab1:
-            st.markdown('### Usuarios del Sistema')
-            users = list_all_users()
+    # ============ PESTAÑA 1: USUARIOS ============
+    with admin_tab1:
+        st.markdown('### Usuarios del Sistema')
+        users = list_all_users()
+        
+        if users:
+            # Contador de usuarios
+            col_stats1, col_stats2, col_stats3 = st.columns(3)
+            with col_stats1:
+                admin_count = sum(1 for u in users if u['is_admin'])
+                col_stats1.metric('👥 Total de Usuarios', len(users), delta=None)
+            with col_stats2:
+                col_stats2.metric('🔐 Administradores', admin_count, delta=None)
+            with col_stats3:
+                col_stats3.metric('📝 Usuarios Regulares', len(users) - admin_count, delta=None)
+            
+            st.markdown('---')
             
-            if users:
-                # Contador de usuarios
-                col_stats1, col_stats2, col_stats3 = st.columns(3)
-                with col_stats1:
-                    admin_count = sum(1 for u in users if get_user_info(u['username']).get('is_admin', False))
-                    col_stats1.metric('👥 Total de Usuarios', len(users), delta=None)
-                with col_stats2:
-                    col_stats2.metric('🔐 Administradores', admin_count, delta=None)
-                with col_stats3:
-                    col_stats3.metric('📝 Usuarios Regulares', len(users) - admin_count, delta=None)
+            # Lista de usuarios con mejor estética
+            for idx, u in enumerate(users):
+                is_admin_flag = u['is_admin']
                 
-                st.markdown('---')
+                # Tarjeta mejorada con gradiente
+                badge_color = '#00d4ff' if is_admin_flag else '#888'
+                badge_text = '👑 ADMINISTRADOR' if is_admin_flag else '👤 USUARIO'
+                badge_bg = '#020024' if is_admin_flag else '#f0f0f0'
                 
-                # Lista de usuarios con mejor estética
-                for idx, u in enumerate(users):
-                    info = get_user_info(u['username'])
-                    is_admin_flag = info.get('is_admin', False) if info else False
-                    
-                    # Tarjeta mejorada con gradiente
-                    badge_color = '#00d4ff' if is_admin_flag else '#888'
-                    badge_text = '👑 ADMINISTRADOR' if is_admin_flag else '👤 USUARIO'
-                    badge_bg = '#020024' if is_admin_flag else '#f0f0f0'
-                    
-                    card_html = f"""
-                    <div style='background: linear-gradient(135deg, #ffffff 0%, #f8f9ff 100%); 
-                                border-left: 5px solid {badge_color}; 
-                                padding: 18px; border-radius: 12px; margin-bottom: 15px;
-                                box-shadow: 0 4px 12px rgba(0, 0, 0, 0.08); transition: all 0.3s ease;'>
-                        <div style='display: flex; justify-content: space-between; align-items: center;'>
-                            <div>
-                                <h4 style='margin: 0; color: #020024; font-size: 1.1em;'>👤 {u['username']}</h4>
-                                <div style='color: #555; font-size: 0.95em; margin-top: 6px;'>
-                                    📧 <span style='color: #0066cc;'>{u['email']}</span> • 📅 {u['created_at'][:10]}
-                                </div>
-                                {f"<div style='color: #666; font-size: 0.9em; margin-top: 4px;'>⏱️ Último acceso: {info.get('last_login')[:19]}</div>" if info and info.get('last_login') else "<div style='color: #999; font-size: 0.9em; margin-top: 4px;'>⏱️ Nunca ha ingresado</div>"}
-                            </div>
-                            <div style='text-align: center;'>
-                                <span style='background: {badge_bg}; color: {badge_color}; padding: 8px 14px; 
-                                            border-radius: 20px; font-weight: bold; font-size: 0.85em;'>
-                                    {badge_text}
-                                </span>
+                card_html = f"""
+                <div style='background: linear-gradient(135deg, #ffffff 0%, #f8f9ff 100%); 
+                            border-left: 5px solid {badge_color}; 
+                            padding: 18px; border-radius: 12px; margin-bottom: 15px;
+                            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.08); transition: all 0.3s ease;'>
+                    <div style='display: flex; justify-content: space-between; align-items: center;'>
+                        <div>
+                            <h4 style='margin: 0; color: #020024; font-size: 1.1em;'>👤 {u['username']}</h4>
+                            <div style='color: #555; font-size: 0.95em; margin-top: 6px;'>
+                                📧 <span style='color: #0066cc;'>{u['email']}</span> • 📅 {u['created_at'][:10]}
                             </div>
+                            {f"<div style='color: #666; font-size: 0.9em; margin-top: 4px;'>⏱️ Último acceso: {u['last_login'][:19]}</div>" if u['last_login'] else "<div style='color: #999; font-size: 0.9em; margin-top: 4px;'>⏱️ Nunca ha ingresado</div>"}
+                        </div>
+                        <div style='text-align: center;'>
+                            <span style='background: {badge_bg}; color: {badge_color}; padding: 8px 14px; 
+                                        border-radius: 20px; font-weight: bold; font-size: 0.85em;'>
+                                {badge_text}
+                            </span>
                         </div>
                     </div>
-                    """
-                    st.markdown(card_html, unsafe_allow_html=True)
-                    
-                    # Botones de acción en dos columnas
-                    col_left, col_mid, col_right = st.columns([2, 1, 1])
-                    with col_mid:
-                        if is_admin_flag:
-                            if st.button('🔓 Revocar admin', key=f'demote_{u["username"]}', use_container_width=True):
-                                res = set_user_admin(u['username'], False)
-                                if res['success']:
-                                    st.success(f'✅ {u["username"]} ya no es administrador')
-                                    st.experimental_rerun()
-                                else:
-                                    st.error(res['message'])
-                        else:
-                            if st.button('🔐 Promover a admin', key=f'promote_{u["username"]}', use_container_width=True):
-                                res = set_user_admin(u['username'], True)
-                                if res['success']:
-                                    st.success(f'✅ {u["username"]} ahora es administrador')
-                                    st.experimental_rerun()
-                                else:
-                                    st.error(res['message'])
-            else:
-                st.info('📭 No hay usuarios registrados aún. El primer usuario en registrarse será admin.')
-
-        # ============ PESTAÑA 2: OVERRIDES Y UTILIDADES ============
-        with admin_tab2:
-            st.markdown('### Configuración de Overrides')
-            
-            col_override_left, col_override_right = st.columns([1.5, 1])
-            
-            with col_override_left:
-                st.markdown('**📊 Preview de Overrides Actuales**')
-                try:
-                    overrides = load_stats_overrides()
-                    if overrides:
-                        st.json(overrides)
-                        override_count = len(overrides)
-                        st.markdown(f'<p style="color: #00d4ff; font-weight: bold;">📈 {override_count} override(s) activo(s)</p>', 
-                                   unsafe_allow_html=True)
+                </div>
+                """
+                st.markdown(card_html, unsafe_allow_html=True)
+                
+                # Botones de acción en dos columnas
+                col_left, col_mid, col_right = st.columns([2, 1, 1])
+                with col_mid:
+                    if is_admin_flag:
+                        if st.button('🔓 Revocar admin', key=f'demote_{u["username"]}', use_container_width=True):
+                            res = set_user_admin(u['username'], False)
+                            if res['success']:
+                                st.success(f'✅ {u["username"]} ya no es administrador')
+                                st.experimental_rerun()
+                            else:
+                                st.error(res['message'])
                     else:
-                        st.info('ℹ️ No hay overrides guardados. Sistema usando datos originales.')
-                except Exception as e:
-                    st.warning(f'⚠️ Error al cargar overrides: {str(e)}')
+                        if st.button('🔐 Promover a admin', key=f'promote_{u["username"]}', use_container_width=True):
+                            res = set_user_admin(u['username'], True)
+                            if res['success']:
+                                st.success(f'✅ {u["username"]} ahora es administrador')
+                                st.experimental_rerun()
+                            else:
+                                st.error(res['message'])
+        else:
+            st.info('📭 No hay usuarios registrados aún. El primer usuario en registrarse será admin.')
 
-            with col_override_right:
-                st.markdown('**🛠️ Acciones Rápidas**')
-                
-                if st.button('🗑️ Vaciar Overrides', use_container_width=True, key='clear_overrides'):
-                    save_stats_overrides({})
-                    st.success('✅ Overrides vaciados. Sistema restaurado.')
-                    st.experimental_rerun()
-                
-                if st.button('🔄 Recargar Sistema', use_container_width=True, key='reload_system'):
-                    st.success('✅ Sistema recargado.')
-                    st.experimental_rerun()
+    # ============ PESTAÑA 2: OVERRIDES Y UTILIDADES ============
+    with admin_tab2:
+        st.markdown('### Configuración de Overrides')
+        
+        col_override_left, col_override_right = st.columns([1.5, 1])
+        
+        with col_override_left:
+            st.markdown('**📊 Preview de Overrides Actuales**')
+            try:
+                overrides = load_stats_overrides()
+                if overrides:
+                    st.json(overrides)
+                    override_count = len(overrides)
+                    st.markdown(f'<p style="color: #00d4ff; font-weight: bold;">📈 {override_count} override(s) activo(s)</p>', 
+                               unsafe_allow_html=True)
+                else:
+                    st.info('ℹ️ No hay overrides guardados. Sistema usando datos originales.')
+            except Exception as e:
+                st.warning(f'⚠️ Error al cargar overrides: {str(e)}')
 
-            st.markdown('---')
-            st.markdown('### 📋 Información del Sistema')
-            
-            sys_col1, sys_col2, sys_col3 = st.columns(3)
-            with sys_col1:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%); 
-                            padding: 15px; border-radius: 10px; text-align: center;'>
-                    <div style='font-size: 1.8em; margin-bottom: 8px;'>📁</div>
-                    <div style='color: #1565c0; font-weight: bold;'>data/users.json</div>
-                    <div style='color: #666; font-size: 0.9em; margin-top: 4px;'>Base de datos de usuarios</div>
-                </div>
-                """, unsafe_allow_html=True)
+        with col_override_right:
+            st.markdown('**🛠️ Acciones Rápidas**')
             
-            with sys_col2:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #f3e5f5 0%, #e1bee7 100%); 
-                            padding: 15px; border-radius: 10px; text-align: center;'>
-                    <div style='font-size: 1.8em; margin-bottom: 8px;'>⚙️</div>
-                    <div style='color: #6a1b9a; font-weight: bold;'>data/stats_overrides.json</div>
-                    <div style='color: #666; font-size: 0.9em; margin-top: 4px;'>Configuración de estadísticas</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with sys_col3:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); 
-                            padding: 15px; border-radius: 10px; text-align: center;'>
-                    <div style='font-size: 1.8em; margin-bottom: 8px;'>🔐</div>
-                    <div style='color: #2e7d32; font-weight: bold;'>Clave Admin</div>
-                    <div style='color: #666; font-size: 0.9em; margin-top: 4px;'>admin123</div>
-                </div>
-                """, unsafe_allow_html=True)
+            if st.button('🗑️ Vaciar Overrides', use_container_width=True, key='clear_overrides'):
+                save_stats_overrides({})
+                st.success('✅ Overrides vaciados. Sistema restaurado.')
+                st.experimental_rerun()
             
-            st.markdown('---')
+            if st.button('🔄 Recargar Sistema', use_container_width=True, key='reload_system'):
+                st.success('✅ Sistema recargado.')
+                st.experimental_rerun()
+
+        st.markdown('---')
+        st.markdown('### 📋 Información del Sistema')
+        
+        sys_col1, sys_col2, sys_col3 = st.columns(3)
+        user_store = user_directory().store
+        with sys_col1:
+            st.markdown(f"""
+            <div style='background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%); 
+                        padding: 15px; border-radius: 10px; text-align: center;'>
+                <div style='font-size: 1.8em; margin-bottom: 8px;'>📁</div>
+                <div style='color: #1565c0; font-weight: bold;'>{user_store.path}</div>
+                <div style='color: #666; font-size: 0.9em; margin-top: 4px;'>Base de datos de usuarios ({user_store.backend})</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with sys_col2:
             st.markdown("""
-            <div style='background: #fffacd; border-left: 4px solid #ff8c00; padding: 15px; border-radius: 8px;'>
-                <strong style='color: #ff8c00;'>⚠️ Importante:</strong>
-                <div style='color: #333; margin-top: 8px; font-size: 0.95em;'>
-                    • Estas acciones afectan directamente a la seguridad y funcionamiento de la aplicación<br>
-                    • Ten cuidado al modificar permisos de administrador<br>
-                    • Los overrides anulan datos originales; vacíalos para restaurar valores reales<br>
-                    • Considera hacer backups de data/users.json antes de cambios críticos
-                </div>
+            <div style='background: linear-gradient(135deg, #f3e5f5 0%, #e1bee7 100%); 
+                        padding: 15px; border-radius: 10px; text-align: center;'>
+                <div style='font-size: 1.8em; margin-bottom: 8px;'>⚙️</div>
+                <div style='color: #6a1b9a; font-weight: bold;'>data/stats_overrides.json</div>
+                <div style='color: #666; font-size: 0.9em; margin-top: 4px;'>Configuración de estadísticas</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with sys_col3:
+            st.markdown("""
+            <div style='background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); 
+                        padding: 15px; border-radius: 10px; text-align: center;'>
+                <div style='font-size: 1.8em; margin-bottom: 8px;'>🔐</div>
+                <div style='color: #2e7d32; font-weight: bold;'>Clave Admin</div>
+                <div style='color: #666; font-size: 0.9em; margin-top: 4px;'>admin123</div>
             </div>
             """, unsafe_allow_html=True)
 
+        registry_stats = DATASETS.stats()
+        st.caption(
+            f"🗄️ Datasets compartidos: {registry_stats['datasets']} · "
+            f"{registry_stats['total_mb']:.1f} / {registry_stats['budget_mb']:.0f} MB · "
+            f"aciertos {registry_stats['hits']} · cargas {registry_stats['misses']} · "
+            f"desalojos {registry_stats['evictions']}"
+        )
+        directory = user_directory()
+        directory_stats = directory.stats()
+        metadata_stats = directory.metadata.stats()
+        st.caption(
+            f"👥 Directorio de usuarios en memoria: {directory_stats['users']} usuarios · "
+            f"lecturas del almacén {directory_stats['loads']} · consultas sin leerlo {directory_stats['hits']} · "
+            f"accesos pendientes de guardar {metadata_stats['pending']} · volcados {metadata_stats['flushes']}"
+        )
+        figure_stats = FIGURES.stats()
+        st.caption(
+            f"🖼️ Figuras en caché: {figure_stats['figures']} · "
+            f"{figure_stats['total_mb']:.1f} / {figure_stats['budget_mb']:.0f} MB · "
+            f"aciertos {figure_stats['hits']} · fallos {figure_stats['misses']} · "
+            f"desalojos {figure_stats['evictions']}"
+            + (f" · disco {figure_stats['disk']}" if figure_stats['disk'] else '')
+        )
+        
+        st.markdown('---')
+        st.markdown(f"""
+        <div style='background: #fffacd; border-left: 4px solid #ff8c00; padding: 15px; border-radius: 8px;'>
+            <strong style='color: #ff8c00;'>⚠️ Importante:</strong>
+            <div style='color: #333; margin-top: 8px; font-size: 0.95em;'>
+                • Estas acciones afectan directamente a la seguridad y funcionamiento de la aplicación<br>
+                • Ten cuidado al modificar permisos de administrador<br>
+                • Los overrides anulan datos originales; vacíalos para restaurar valores reales<br>
+                • Considera hacer backups de {user_store.path} antes de cambios críticos
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+# ============ PRECARGA DE LA SIGUIENTE VISTA ============
+# Heurística simple: se precarga la vista siguiente en el orden de la lista de pestañas
+next_view = tabs_labels[(tabs_labels.index(active_view) + 1) % len(tabs_labels)]
+graph.prefetch(VIEW_PRODUCTS.get(next_view, []), PREFETCH_EXECUTOR)
+
+# ============ MÉTRICAS DE CÁLCULO ============
+graph_stats = graph.stats()
+st.sidebar.caption(
+    f"⚡ Cálculos en esta vista: {graph_stats['computed'] - stats_before_view['computed']} realizados · "
+    f"{graph_stats['avoided'] - stats_before_view['avoided']} evitados · "
+    f"{graph_stats['prefetched']} precargados en segundo plano con estos filtros"
+)
+
 # ============ TABLA GENERAL ============
 st.header('📋 Tabla de Datos Filtrados')
 st.dataframe(filtered, use_container_width=True)
@@ -1,13 +1,30 @@
 import os
+import base64
+import csv
 import json
 import hashlib
 import hmac
 import re
-from pathlib import Path
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from datetime import datetime
 
-# Ruta del archivo de usuarios
-USERS_FILE = 'data/users.json'
+from src.user_store import WriteBehindQueue, get_user_store
+
+# Hash de contraseñas: '<algoritmo>$<versión>$<parámetros>$<sal>$<hash>', p. ej.
+# 'scrypt$v1$n=16384,r=8,p=1$<sal base64>$<hash base64>'. Los hashes antiguos
+# (SHA-256 hex sin sal) se verifican y se rehashean en el siguiente login.
+# El coste se ajusta con calibrate_kdf.py y las variables SHOTS_KDF_*.
+HASH_VERSION = 'v1'
+KDF_ALGORITHMS = ('scrypt', 'pbkdf2_sha256')
+KDF_ALGORITHM = os.environ.get('SHOTS_KDF_ALGORITHM', 'scrypt')
+SCRYPT_N = int(os.environ.get('SHOTS_KDF_SCRYPT_N', str(2 ** 14)))
+SCRYPT_R = int(os.environ.get('SHOTS_KDF_SCRYPT_R', '8'))
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get('SHOTS_KDF_PBKDF2_ITERATIONS', '600000'))
+SALT_BYTES = 16
+KEY_BYTES = 32
 
 def validate_password_strength(password: str) -> dict:
     """
@@ -44,107 +61,431 @@ def validate_password_strength(password: str) -> dict:
     
     return {'valid': True, 'message': 'Contraseña válida'}
 
-def hash_password(password: str) -> str:
-    """Hashear contraseña con SHA-256."""
+def kdf_params(algorithm: str = None) -> dict:
+    """Parámetros de coste configurados para ``algorithm`` (por defecto ``KDF_ALGORITHM``)."""
+    algorithm = algorithm or KDF_ALGORITHM
+    if algorithm == 'scrypt':
+        return {'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P}
+    if algorithm == 'pbkdf2_sha256':
+        return {'i': PBKDF2_ITERATIONS}
+    raise ValueError(f"KDF desconocido: '{algorithm}' (usa {', '.join(KDF_ALGORITHMS)})")
+
+def derive_key(password: str, salt: bytes, algorithm: str, params: dict) -> bytes:
+    """Clave derivada de ``password`` con el KDF y los parámetros indicados."""
+    if algorithm == 'scrypt':
+        n, r, p = params['n'], params['r'], params['p']
+        # Memoria de scrypt ~128·r·n bytes; OpenSSL la limita a 32 MB si no se indica
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * r * (n + p + 2) + 1024 ** 2, dklen=KEY_BYTES)
+    if algorithm == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, params['i'], dklen=KEY_BYTES)
+    raise ValueError(f"KDF desconocido: '{algorithm}' (usa {', '.join(KDF_ALGORITHMS)})")
+
+def _legacy_hash(password: str) -> str:
+    """Formato anterior: SHA-256 sin sal (solo para verificar cuentas antiguas)."""
     return hashlib.sha256(password.encode()).hexdigest()
 
-def ensure_users_file():
-    """Crear archivo de usuarios si no existe."""
-    Path('data').mkdir(exist_ok=True)
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'w') as f:
-            json.dump({}, f)
+def hash_password(password: str, algorithm: str = None, params: dict = None) -> str:
+    """Hashear contraseña con sal aleatoria y el KDF configurado.
+
+    Args:
+        password: Contraseña en claro.
+        algorithm: ``scrypt`` o ``pbkdf2_sha256`` (por defecto ``KDF_ALGORITHM``).
+        params: Parámetros de coste (por defecto ``kdf_params(algorithm)``).
+
+    Returns:
+        Hash en formato ``algoritmo$versión$parámetros$sal$hash``.
+    """
+    algorithm = algorithm or KDF_ALGORITHM
+    params = params or kdf_params(algorithm)
+    salt = os.urandom(SALT_BYTES)
+    key = derive_key(password, salt, algorithm, params)
+    encoded_params = ','.join(f'{name}={value}' for name, value in params.items())
+    return '$'.join((
+        algorithm, HASH_VERSION, encoded_params,
+        base64.b64encode(salt).decode('ascii'), base64.b64encode(key).decode('ascii'),
+    ))
+
+def parse_password_hash(stored: str):
+    """Descompone un hash en ``(algoritmo, versión, parámetros, sal, hash)``.
+
+    Returns:
+        La tupla, o None si es un hash antiguo (SHA-256) o no tiene el formato.
+    """
+    parts = stored.split('$')
+    if len(parts) != 5 or parts[0] not in KDF_ALGORITHMS:
+        return None
+    algorithm, version, encoded_params, salt, key = parts
+    try:
+        params = {name: int(value) for name, value in (item.split('=') for item in encoded_params.split(','))}
+        return algorithm, version, params, base64.b64decode(salt), base64.b64decode(key)
+    except ValueError:
+        return None
+
+def verify_password(password: str, stored: str) -> bool:
+    """Comprobar ``password`` contra un hash (formato actual o SHA-256 antiguo)."""
+    parsed = parse_password_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest(_legacy_hash(password), stored)
+    algorithm, _, params, salt, key = parsed
+    try:
+        return hmac.compare_digest(derive_key(password, salt, algorithm, params), key)
+    except (KeyError, ValueError):
+        return False
+
+def needs_rehash(stored: str) -> bool:
+    """True si el hash es antiguo o usa otro KDF, versión o coste que el configurado."""
+    parsed = parse_password_hash(stored)
+    if parsed is None:
+        return True
+    algorithm, version, params, _, _ = parsed
+    return algorithm != KDF_ALGORITHM or version != HASH_VERSION or params != kdf_params()
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Para usuarios inexistentes también se paga un KDF: el tiempo no revela si existen
+    return hash_password(os.urandom(16).hex())
+
+def _store():
+    """Backend de usuarios configurado (ver ``src.user_store``)."""
+    return get_user_store()
+
+
+class UserDirectory:
+    """Copia en memoria de los usuarios con índices por nombre y por email.
+
+    Se carga una vez por proceso y se vuelve a leer solo cuando la firma del
+    almacén cambia por una escritura de otro proceso. Las escrituras de este
+    proceso pasan por ``add``/``add_many``/``update``/``update_many``, que
+    aplican el cambio en memoria y adoptan la nueva firma sin recargar. Los
+    registros se comparten: no deben modificarse.
+
+    Los metadatos no críticos (``last_login``) se escriben de forma diferida
+    con ``metadata``, que vuelca a través del propio directorio; las lecturas
+    superponen los valores aún pendientes.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.metadata = WriteBehindQueue(self)
+        self._users = {}
+        self._emails = {}
+        self._signature = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def _refresh(self):
+        signature = self.store.signature()
+        with self._lock:
+            if self._loaded and signature == self._signature:
+                self.hits += 1
+                return
+            users = self.store.all()
+            self._users = users
+            self._emails = {data.get('email'): username for username, data in users.items()}
+            self._signature = signature
+            self._loaded = True
+            self.loads += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def _written(self, before, changes: dict):
+        """Aplica en memoria lo que este proceso acaba de escribir.
+
+        ``before`` es la firma leída justo antes de escribir. Si no coincide con
+        la cargada, otro proceso escribió entre medias: no se toca la copia y la
+        próxima lectura la recarga. Los dicts se reemplazan en vez de mutarse
+        porque ``all`` los comparte con quien lee.
+        """
+        after = self.store.signature()
+        with self._lock:
+            if not self._loaded or before != self._signature:
+                return
+            users = dict(self._users)
+            emails = dict(self._emails)
+            for username, fields in changes.items():
+                previous = users.get(username, {})
+                if 'email' in fields:
+                    emails.pop(previous.get('email'), None)
+                    emails[fields['email']] = username
+                users[username] = {**previous, **fields}
+            self._users = users
+            self._emails = emails
+            self._signature = after
+
+    def add(self, username: str, record: dict) -> bool:
+        """Alta en el almacén; False si el usuario o el email ya existían."""
+        with self._write_lock:
+            before = self.store.signature()
+            added = self.store.add(username, record)
+            self._written(before, {username: record} if added else {})
+        return added
+
+    def add_many(self, records: dict) -> list:
+        """Altas en una sola escritura; devuelve los usuarios rechazados."""
+        with self._write_lock:
+            before = self.store.signature()
+            rejected = self.store.add_many(records)
+            self._written(before, {
+                username: record for username, record in records.items() if username not in rejected
+            })
+        return rejected
+
+    def update(self, username: str, **fields) -> bool:
+        """Actualiza campos de un usuario; False si no existe."""
+        with self._write_lock:
+            before = self.store.signature()
+            updated = self.store.update(username, **fields)
+            self._written(before, {username: fields} if updated else {})
+        return updated
+
+    def update_many(self, updates: dict) -> int:
+        """Actualizaciones de varios usuarios en una sola escritura (volcado de ``metadata``)."""
+        with self._write_lock:
+            before = self.store.signature()
+            updated = self.store.update_many(updates)
+            with self._lock:
+                known = self._users
+            self._written(before, {
+                username: fields for username, fields in updates.items() if username in known
+            })
+        return updated
+
+    def get(self, username: str):
+        self._refresh()
+        record = self._users.get(username)
+        pending = self.metadata.pending(username)
+        if record is None or not pending:
+            return record
+        return {**record, **pending}
+
+    def email_exists(self, email: str) -> bool:
+        self._refresh()
+        return email in self._emails
+
+    def all(self) -> dict:
+        self._refresh()
+        pending = self.metadata.pending_all()
+        if not pending:
+            return self._users
+        return {
+            username: {**record, **pending[username]} if username in pending else record
+            for username, record in self._users.items()
+        }
+
+    def stats(self) -> dict:
+        """Usuarios en memoria, lecturas del almacén y consultas servidas sin leerlo."""
+        return {'users': len(self._users), 'loads': self.loads, 'hits': self.hits}
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def user_directory() -> UserDirectory:
+    """Directorio de usuarios del proceso para el almacén configurado."""
+    global _directory
+    store = _store()
+    with _directory_lock:
+        if _directory is None or _directory.store is not store:
+            _directory = UserDirectory(store)
+        return _directory
+
+def _normalize_username(username) -> str:
+    """Usuario tal como se guarda (sin espacios alrededor).
+
+    Todas las funciones que reciben un usuario lo normalizan igual que el
+    registro, para que ``'  bob  '`` encuentre a ``bob``.
+    """
+    return str(username or '').strip()
 
 def user_exists(username: str) -> bool:
     """Verificar si un usuario existe."""
-    ensure_users_file()
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
-    return username in users
+    return user_directory().get(_normalize_username(username)) is not None
 
-def register_user(username: str, email: str, password: str) -> dict:
-    """
-    Registrar un nuevo usuario.
-    Retorna: {'success': bool, 'message': str}
+def _normalize_registration(username, email):
+    """Usuario y email tal como se validan y guardan (sin espacios alrededor).
+
+    La contraseña no se normaliza: los espacios forman parte de ella.
     """
-    ensure_users_file()
-    
-    # Validaciones
+    return _normalize_username(username), str(email or '').strip()
+
+def _registration_error(username: str, email: str, password: str):
+    """Mensaje de la primera validación de registro que falla, o None."""
     if len(username) < 3:
-        return {'success': False, 'message': 'El usuario debe tener al menos 3 caracteres'}
+        return 'El usuario debe tener al menos 3 caracteres'
     
     # Validar fortaleza de contraseña
     pwd_validation = validate_password_strength(password)
     if not pwd_validation['valid']:
-        return {'success': False, 'message': pwd_validation['message']}
+        return pwd_validation['message']
     
     if '@' not in email or '.' not in email:
-        return {'success': False, 'message': 'Email inválido'}
+        return 'Email inválido'
+    return None
+
+def register_user(username: str, email: str, password: str) -> dict:
+    """
+    Registrar un nuevo usuario.
+    Retorna: {'success': bool, 'message': str}
+    """
+    # Validaciones (mismas reglas y normalización que el alta masiva)
+    username, email = _normalize_registration(username, email)
+    error = _registration_error(username, email, password)
+    if error:
+        return {'success': False, 'message': error}
     
-    # Leer usuarios actuales
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
+    directory = user_directory()
     
     # Verificar si el usuario ya existe
-    if username in users:
+    if directory.get(username) is not None:
         return {'success': False, 'message': 'El usuario ya existe'}
     
-    # Verificar si el email ya está registrado
-    for user_data in users.values():
-        if user_data['email'] == email:
-            return {'success': False, 'message': 'El email ya está registrado'}
+    # Verificar si el email ya está registrado (índice por email)
+    if directory.email_exists(email):
+        return {'success': False, 'message': 'El email ya está registrado'}
     
-    # Crear nuevo usuario
-    users[username] = {
+    # Crear nuevo usuario (el store rechaza duplicados creados en paralelo)
+    created = directory.add(username, {
         'email': email,
         'password_hash': hash_password(password),
         'created_at': datetime.now().isoformat(),
         'last_login': None
-    }
-    
-    # Guardar usuarios
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    })
+    if not created:
+        return {'success': False, 'message': 'El usuario o el email ya están registrados'}
     
     return {'success': True, 'message': f'Usuario "{username}" registrado exitosamente'}
 
+# Por debajo de este número de altas no compensa arrancar procesos para hashear
+BULK_POOL_MIN_USERS = 8
+
+def load_user_records(path: str) -> list:
+    """Leer altas de usuarios de un CSV o JSON.
+
+    El CSV necesita cabecera con ``username,email,password``. El JSON puede ser
+    una lista de objetos con esas claves o ``{username: {email, password}}``.
+    """
+    if str(path).lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [{'username': username, **fields} for username, fields in data.items()]
+        return list(data)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+def _hash_passwords(passwords: list, workers: int = None) -> list:
+    """Hashes de ``passwords`` en orden, repartidos en un pool de procesos."""
+    if workers == 1 or len(passwords) < BULK_POOL_MIN_USERS:
+        return [hash_password(password) for password in passwords]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hash_password, passwords, chunksize=chunksize))
+
+def bulk_register_users(records, workers: int = None) -> dict:
+    """Registrar muchos usuarios de una vez.
+
+    Valida todas las filas con las mismas reglas que ``register_user``,
+    comprueba duplicados contra los índices del directorio y dentro del propio
+    lote, hashea las contraseñas en paralelo y guarda todas las altas válidas
+    en una única escritura atómica (JSON) o transacción (SQLite).
+
+    Args:
+        records: Iterable de dicts con ``username``, ``email`` y ``password``
+            (p. ej. de ``load_user_records``).
+        workers: Procesos para hashear (por defecto uno por núcleo; 1 = sin pool).
+
+    Returns:
+        ``{'created': int, 'failed': int, 'rows': [...]}`` con una entrada por
+        fila: ``{'row', 'username', 'success', 'message'}`` (``row`` empieza en 1).
+    """
+    directory = user_directory()
+    rows = []
+    accepted = []
+    batch_users, batch_emails = set(), set()
+    for row, record in enumerate(records, 1):
+        username, email = _normalize_registration(record.get('username'), record.get('email'))
+        password = str(record.get('password') or '')
+        error = _registration_error(username, email, password)
+        if error is None:
+            if directory.get(username) is not None:
+                error = 'El usuario ya existe'
+            elif directory.email_exists(email):
+                error = 'El email ya está registrado'
+            elif username in batch_users:
+                error = 'Usuario repetido en la importación'
+            elif email in batch_emails:
+                error = 'Email repetido en la importación'
+        rows.append({'row': row, 'username': username, 'success': error is None, 'message': error})
+        if error is None:
+            batch_users.add(username)
+            batch_emails.add(email)
+            accepted.append((rows[-1], email, password))
+
+    hashes = _hash_passwords([password for _, _, password in accepted], workers)
+    created_at = datetime.now().isoformat()
+    new_users = {
+        entry['username']: {
+            'email': email,
+            'password_hash': password_hash,
+            'created_at': created_at,
+            'last_login': None
+        }
+        for (entry, email, _), password_hash in zip(accepted, hashes)
+    }
+    # El store vuelve a comprobar duplicados (altas concurrentes) dentro de la escritura
+    rejected = set(directory.add_many(new_users)) if new_users else set()
+
+    for entry, _, _ in accepted:
+        if entry['username'] in rejected:
+            entry['success'] = False
+            entry['message'] = 'El usuario o el email ya están registrados'
+        else:
+            entry['message'] = f'Usuario "{entry["username"]}" registrado exitosamente'
+    created = sum(1 for entry in rows if entry['success'])
+    return {'created': created, 'failed': len(rows) - created, 'rows': rows}
+
 def login_user(username: str, password: str) -> dict:
     """
     Verificar credenciales de login.
     Retorna: {'success': bool, 'message': str, 'user': str}
+    ('user' es el nombre guardado, ya normalizado)
     """
-    ensure_users_file()
-    
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
+    username = _normalize_username(username)
+    directory = user_directory()
+    user_data = directory.get(username)
     
-    if username not in users:
+    if user_data is None:
+        verify_password(password, _dummy_hash())
         return {'success': False, 'message': 'Usuario o contraseña incorrectos'}
     
-    user_data = users[username]
-    password_hash = hash_password(password)
-    
-    if user_data['password_hash'] != password_hash:
+    if not verify_password(password, user_data['password_hash']):
         return {'success': False, 'message': 'Usuario o contraseña incorrectos'}
     
-    # Actualizar último login
-    user_data['last_login'] = datetime.now().isoformat()
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    # Hash antiguo (SHA-256) o con otro coste: se rehashea ahora que tenemos la contraseña
+    if needs_rehash(user_data['password_hash']):
+        directory.update(username, password_hash=hash_password(password))
+    
+    # Último login: escritura diferida, se agrupa con otros logins cercanos
+    directory.metadata.put(username, last_login=datetime.now().isoformat())
     
     return {'success': True, 'message': f'Bienvenido {username}', 'user': username}
 
 def get_user_info(username: str) -> dict:
     """Obtener información del usuario."""
-    ensure_users_file()
+    username = _normalize_username(username)
+    user_data = user_directory().get(username)
     
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
-    
-    if username not in users:
+    if user_data is None:
         return None
     
-    user_data = users[username]
     return {
         'username': username,
         'email': user_data['email'],
@@ -155,42 +496,34 @@ def get_user_info(username: str) -> dict:
 
 def update_password(username: str, old_password: str, new_password: str) -> dict:
     """Cambiar contraseña de un usuario."""
-    ensure_users_file()
-    
     # Validar fortaleza de contraseña
     pwd_validation = validate_password_strength(new_password)
     if not pwd_validation['valid']:
         return {'success': False, 'message': pwd_validation['message']}
     
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
+    username = _normalize_username(username)
+    directory = user_directory()
+    user_data = directory.get(username)
     
-    if username not in users:
+    if user_data is None:
         return {'success': False, 'message': 'Usuario no encontrado'}
     
-    user_data = users[username]
-    
     # Verificar contraseña anterior
-    if user_data['password_hash'] != hash_password(old_password):
+    if not verify_password(old_password, user_data['password_hash']):
         return {'success': False, 'message': 'La contraseña anterior es incorrecta'}
     
     # Actualizar contraseña
-    user_data['password_hash'] = hash_password(new_password)
-    
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    directory.update(username, password_hash=hash_password(new_password))
     
     return {'success': True, 'message': 'Contraseña actualizada exitosamente'}
 
 
 def is_admin(username: str) -> bool:
     """Verifica si el usuario es administrador."""
-    ensure_users_file()
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
-    if username not in users:
+    user_data = user_directory().get(_normalize_username(username))
+    if user_data is None:
         return False
-    return users[username].get('is_admin', False)
+    return user_data.get('is_admin', False)
 
 
 def set_user_admin(username: str, make_admin: bool) -> dict:
@@ -198,29 +531,24 @@ def set_user_admin(username: str, make_admin: bool) -> dict:
 
     Retorna {'success': bool, 'message': str}.
     """
-    ensure_users_file()
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
-    if username not in users:
+    username = _normalize_username(username)
+    directory = user_directory()
+    updated = directory.update(username, is_admin=bool(make_admin))
+    if not updated:
         return {'success': False, 'message': 'Usuario no encontrado'}
-    users[username]['is_admin'] = bool(make_admin)
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
     return {'success': True, 'message': f'Usuario "{username}" actualizado is_admin={make_admin}'}
 
 def list_all_users() -> list:
     """Listar todos los usuarios (sin contraseñas)."""
-    ensure_users_file()
-    
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
+    users = user_directory().all()
     
     return [
         {
             'username': username,
             'email': user_data['email'],
             'created_at': user_data['created_at'],
-            'last_login': user_data['last_login']
+            'last_login': user_data['last_login'],
+            'is_admin': user_data.get('is_admin', False)
         }
         for username, user_data in users.items()
     ]
@@ -0,0 +1,150 @@
+"""Caché columnar en disco para los CSV de tiros.
+
+La primera carga de un CSV guarda el DataFrame ya normalizado en formato
+Feather (Arrow IPC sin compresión) dentro de ``data/.cache``. Las cargas
+siguientes abren ese archivo con memory-map mientras la huella del CSV
+(tamaño, mtime o, si estos cambian, hash de contenido) siga siendo la misma.
+
+Si ``pyarrow`` no está instalado la caché se desactiva y se parsea el CSV.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR = 'data/.cache'
+CACHE_VERSION = 1
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def arrow_available() -> bool:
+    """Indica si pyarrow está disponible para leer/escribir Feather."""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def file_stat(path) -> dict:
+    """Huella rápida de un archivo: tamaño y mtime en nanosegundos."""
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def content_hash(path) -> str:
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(csv_path, variant: str):
+    """Rutas (feather, meta) de la caché asociada a un CSV y variante de carga."""
+    resolved = str(Path(csv_path).resolve())
+    key = hashlib.sha1(resolved.encode()).hexdigest()[:16]
+    base = Path(CACHE_DIR) / f'{Path(csv_path).stem}-{key}-{variant}'
+    return Path(f'{base}.feather'), Path(f'{base}.json')
+
+
+def _read_meta(meta_path: Path):
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(meta_path: Path, meta: dict):
+    tmp_path = meta_path.with_name(meta_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def source_fingerprint(csv_path, variant: str = 'compact') -> str:
+    """Hash de contenido de un CSV.
+
+    Reutiliza el hash guardado en la caché cuando tamaño y mtime coinciden,
+    de modo que no hace falta releer el archivo completo.
+    """
+    stat = file_stat(csv_path)
+    _, meta_path = _cache_paths(csv_path, variant)
+    meta = _read_meta(meta_path)
+    if meta and meta['size'] == stat['size'] and meta['mtime_ns'] == stat['mtime_ns']:
+        return meta['sha256']
+    return content_hash(csv_path)
+
+
+def _read_feather(feather_path: Path) -> pd.DataFrame:
+    import pyarrow.feather as feather
+
+    table = feather.read_table(feather_path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_feather(df: pd.DataFrame, feather_path: Path):
+    import pyarrow.feather as feather
+
+    tmp_path = feather_path.with_name(feather_path.name + '.tmp')
+    feather.write_feather(df, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, feather_path)
+
+
+def load_cached_shots(csv_path, parse, variant: str = 'compact') -> pd.DataFrame:
+    """Carga tiros desde la caché columnar o parsea el CSV y la rellena.
+
+    Args:
+        csv_path: Ruta del CSV de tiros.
+        parse: Función que parsea y normaliza el CSV (``csv_path -> DataFrame``).
+        variant: Nombre de la variante de normalización; cada una tiene su archivo.
+
+    Returns:
+        DataFrame normalizado con ``attrs['source_fingerprint']`` (SHA-256 del CSV).
+    """
+    stat = file_stat(csv_path)
+    if not arrow_available():
+        df = parse(csv_path)
+        df.attrs['source_fingerprint'] = content_hash(csv_path)
+        return df
+
+    feather_path, meta_path = _cache_paths(csv_path, variant)
+    meta = _read_meta(meta_path)
+    digest = None
+
+    if meta is not None and feather_path.exists():
+        if meta['size'] == stat['size'] and meta['mtime_ns'] == stat['mtime_ns']:
+            digest = meta['sha256']
+        else:
+            # El archivo fue tocado: solo se invalida si el contenido cambió
+            digest = content_hash(csv_path)
+            if digest == meta['sha256']:
+                try:
+                    _write_meta(meta_path, {**meta, **stat})
+                except OSError:
+                    pass
+        if digest == meta['sha256']:
+            try:
+                df = _read_feather(feather_path)
+            except (OSError, ValueError, TypeError):
+                df = None
+            if df is not None:
+                df.attrs['source_fingerprint'] = digest
+                return df
+
+    if digest is None:
+        digest = content_hash(csv_path)
+    df = parse(csv_path)
+    try:
+        Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        _write_feather(df, feather_path)
+        _write_meta(meta_path, {'version': CACHE_VERSION, 'sha256': digest, **stat})
+    except (OSError, ValueError, TypeError):
+        # Una caché que no se puede escribir no debe impedir la carga
+        pass
+    df.attrs['source_fingerprint'] = digest
+    return df
@@ -0,0 +1,128 @@
+"""Grafo de cálculos memoizados por (dataset, estado de filtros).
+
+Cada producto analítico (estadísticas globales, por equipo, por jugador,
+zonas con ciertos bins, partidos...) se declara una vez con la función que lo
+calcula y sus dependencias. ``get`` lo calcula la primera vez que alguna
+pestaña lo pide y devuelve el mismo resultado en las siguientes peticiones,
+contando cuántos cálculos se han evitado.
+
+Los resultados se comparten entre pestañas: no deben modificarse in situ.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SESSION_KEY = '_compute_graph'
+
+# Hilos compartidos por todas las sesiones para precargar la siguiente vista
+PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='prefetch')
+
+
+def _memo_key(name: str, params: dict) -> tuple:
+    return (name, tuple(sorted(params.items())))
+
+
+class ComputeGraph:
+    """Productos analíticos perezosos con memoización por parámetros.
+
+    Es seguro usarlo desde varios hilos: si un producto se está calculando
+    (p. ej. por una precarga en segundo plano), quien lo pida espera a ese
+    cálculo en lugar de repetirlo.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._products = {}
+        self._results = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.avoided = 0
+        self.prefetched = 0
+
+    def declare(self, name: str, fn, deps=()):
+        """Declara un producto.
+
+        Args:
+            name: Nombre del producto.
+            fn: Función ``fn(*valores_de_deps, **params)``.
+            deps: Dependencias como nombre o ``(nombre, {params})``; sus valores
+                se pasan a ``fn`` en el mismo orden.
+        """
+        self._products[name] = (fn, tuple(deps))
+
+    def get(self, name: str, **params):
+        """Valor del producto ``name`` para ``params``, calculado a lo sumo una vez."""
+        if name not in self._products:
+            raise KeyError(f"Producto '{name}' no declarado")
+        memo_key = _memo_key(name, params)
+        while True:
+            with self._lock:
+                if memo_key in self._results:
+                    self.avoided += 1
+                    return self._results[memo_key]
+                pending = self._inflight.get(memo_key)
+                if pending is None:
+                    pending = self._inflight[memo_key] = threading.Event()
+                    break
+            # Otro hilo lo está calculando: esperar y volver a mirar el resultado
+            pending.wait()
+
+        try:
+            fn, deps = self._products[name]
+            values = []
+            for dep in deps:
+                dep_name, dep_params = (dep, {}) if isinstance(dep, str) else dep
+                values.append(self.get(dep_name, **dep_params))
+            result = fn(*values, **params)
+            with self._lock:
+                self._results[memo_key] = result
+                self.computed += 1
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(memo_key, None)
+            pending.set()
+
+    def is_ready(self, name: str, **params) -> bool:
+        """True si el producto ya está calculado."""
+        with self._lock:
+            return _memo_key(name, params) in self._results
+
+    def prefetch(self, requests, executor):
+        """Calcula en segundo plano los productos que aún no existen.
+
+        Args:
+            requests: Iterable de ``(nombre, {params})``.
+            executor: ``concurrent.futures.Executor`` donde ejecutar los cálculos.
+        """
+        for name, params in requests:
+            if self.is_ready(name, **params):
+                continue
+            executor.submit(self._prefetch_one, name, params)
+
+    def _prefetch_one(self, name: str, params: dict):
+        try:
+            self.get(name, **params)
+        except Exception:
+            # La vista volverá a pedirlo y mostrará el error en primer plano
+            return
+        with self._lock:
+            self.prefetched += 1
+
+    def stats(self) -> dict:
+        """Cálculos realizados, evitados y precargados desde que se creó el grafo."""
+        return {'computed': self.computed, 'avoided': self.avoided, 'prefetched': self.prefetched}
+
+
+def get_compute_graph(store, key, setup) -> ComputeGraph:
+    """Grafo asociado a ``key`` guardado en ``store`` (p. ej. ``st.session_state``).
+
+    Si la clave cambió (otro dataset, otros filtros u overrides) se crea un
+    grafo nuevo y se declaran sus productos con ``setup(graph)``.
+    """
+    graph = store.get(SESSION_KEY)
+    if graph is None or graph.key != key:
+        graph = ComputeGraph(key)
+        setup(graph)
+        store[SESSION_KEY] = graph
+    return graph
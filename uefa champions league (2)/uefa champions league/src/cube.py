@@ -0,0 +1,89 @@
+"""Cubo de agregación de tiros.
+
+Se construye una sola vez por dataset con un único groupby sobre todas las
+dimensiones (temporada, equipo, rival, jugador, partido, situación y tipo de
+tiro). Cada celda guarda goles y tiros; cualquier combinación de filtros y
+``group_by`` se responde sumando celdas en lugar de recorrer los tiros.
+"""
+import pandas as pd
+
+CUBE_DIMENSIONS = ('season', 'team', 'opponent', 'player', 'match_id', 'situation', 'shot_type')
+
+
+class ShotCube:
+    """Conteos de goles/tiros por combinación de dimensiones.
+
+    ``cells`` conserva el orden de primera aparición de cada combinación en
+    los tiros originales, lo que permite reproducir también los ``'first'``
+    de ``analyze_by_match``.
+    """
+
+    def __init__(self, cells: pd.DataFrame, dimensions: tuple):
+        self.cells = cells
+        self.dimensions = tuple(dimensions)
+
+    @classmethod
+    def from_shots(cls, df: pd.DataFrame) -> 'ShotCube':
+        """Construye el cubo a partir de un DataFrame de tiros (una sola pasada)."""
+        dimensions = tuple(dim for dim in CUBE_DIMENSIONS if dim in df.columns)
+        if not dimensions:
+            cells = pd.DataFrame({'goals': [int(df['is_goal'].sum())], 'total_shots': [len(df)]})
+            return cls(cells, dimensions)
+        cells = df.groupby(list(dimensions), observed=True, dropna=False, sort=False)['is_goal'].agg(
+            goals='sum', total_shots='count'
+        ).reset_index()
+        return cls(cells, dimensions)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def filter(self, **filters) -> 'ShotCube':
+        """Sub-cubo con las celdas que cumplen los filtros.
+
+        Cada filtro es ``dimension=valor`` o ``dimension=[valores]``; ``None``
+        significa sin filtro.
+        """
+        mask = None
+        for dim, value in filters.items():
+            if value is None:
+                continue
+            if dim not in self.dimensions:
+                raise KeyError(f"'{dim}' no es una dimensión del cubo {self.dimensions}")
+            if isinstance(value, (list, tuple, set)):
+                cond = self.cells[dim].isin(list(value))
+            else:
+                cond = self.cells[dim] == value
+            mask = cond if mask is None else mask & cond
+        if mask is None:
+            return self
+        return ShotCube(self.cells[mask.to_numpy()], self.dimensions)
+
+    def efficiency(self, group_by: str = None) -> pd.DataFrame:
+        """Equivalente a ``calculate_shooting_efficiency`` sumando celdas."""
+        if group_by is None:
+            total_shots = int(self.cells['total_shots'].sum())
+            total_goals = self.cells['goals'].sum()
+            efficiency = (total_goals / total_shots * 100) if total_shots > 0 else 0
+            return pd.DataFrame({
+                'total_shots': [total_shots],
+                'goals': [total_goals],
+                'efficiency_%': [efficiency]
+            })
+        if group_by not in self.dimensions:
+            raise KeyError(f"'{group_by}' no es una dimensión del cubo {self.dimensions}")
+
+        grouped = self.cells.groupby(group_by, observed=True)[['goals', 'total_shots']].sum().reset_index()
+        grouped['efficiency_%'] = (grouped['goals'] / grouped['total_shots'] * 100).round(2)
+        grouped = grouped.sort_values('efficiency_%', ascending=False)
+        return grouped
+
+    def by_match(self) -> pd.DataFrame:
+        """Equivalente a ``analyze_by_match`` sumando celdas."""
+        if 'match_id' not in self.dimensions:
+            return self.efficiency()
+        agg = {'goals': 'sum', 'total_shots': 'sum'}
+        agg.update({col: 'first' for col in ('team', 'opponent') if col in self.dimensions})
+        grouped = self.cells.groupby('match_id', observed=True).agg(agg).reset_index()
+        grouped['efficiency_%'] = (grouped['goals'] / grouped['total_shots'] * 100).round(2)
+        grouped = grouped.sort_values('efficiency_%', ascending=False)
+        return grouped
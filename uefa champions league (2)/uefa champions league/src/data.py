@@ -1,15 +1,57 @@
+import hashlib
+import io
+import os
+
 import pandas as pd
 import numpy as np
 
 
-def load_shots(csv_path: str) -> pd.DataFrame:
+# Columnas de texto que se guardan como categorías (códigos enteros + diccionario)
+CATEGORICAL_COLUMNS = ('season', 'team', 'opponent', 'player', 'result', 'situation', 'shot_type')
+
+
+def load_shots(csv_path: str, use_cache: bool = True, compact: bool = True) -> pd.DataFrame:
     """Carga un CSV de tiros y realiza preprocesado mínimo.
 
     Espera columnas: match_id, season, team, opponent, player, minute, x, y, result, situation, shot_type
     x,y están en una escala 0-100 donde (0,0) es la esquina superior izquierda del campo.
+
+    Si ``csv_path`` es una ruta y ``use_cache`` es True, el resultado normalizado se
+    guarda en una caché columnar (ver ``src.cache``) que se reutiliza mientras el CSV
+    no cambie. Los archivos subidos (objetos tipo archivo) siempre se parsean.
+    En todos los casos ``df.attrs['source_fingerprint']`` es el SHA-256 del CSV.
+
+    Con ``compact`` (por defecto) el DataFrame usa la representación compacta de
+    ``compact_shots``: columnas de texto categóricas y tipos numéricos estrechos.
     """
-    df = pd.read_csv(csv_path)
+    def parse(path):
+        return _parse_shots(path, compact=compact)
+
+    if use_cache and isinstance(csv_path, (str, os.PathLike)):
+        from src.cache import load_cached_shots
+        return load_cached_shots(csv_path, parse, variant='compact' if compact else 'raw')
+
+    if hasattr(csv_path, 'read'):
+        raw = csv_path.getvalue() if hasattr(csv_path, 'getvalue') else csv_path.read()
+        if isinstance(raw, str):
+            raw = raw.encode()
+        df = parse(io.BytesIO(raw))
+        df.attrs['source_fingerprint'] = hashlib.sha256(raw).hexdigest()
+        return df
+
+    from src.cache import content_hash
+    df = parse(csv_path)
+    df.attrs['source_fingerprint'] = content_hash(csv_path)
+    return df
+
+
+def _parse_shots(csv_path, compact: bool = False) -> pd.DataFrame:
+    """Lee el CSV y normaliza columnas, coordenadas e ``is_goal``."""
+    return _normalize_shots(pd.read_csv(csv_path), compact=compact)
 
+
+def _normalize_shots(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """Normaliza un DataFrame de tiros recién leído (CSV completo o un chunk)."""
     # Normalizar nombres de columnas
     df.columns = [c.strip() for c in df.columns]
 
@@ -19,18 +61,95 @@ def load_shots(csv_path: str) -> pd.DataFrame:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
     # Resultado: goal/missed/saved/blocked
-    if "result" in df.columns:
+    if "result" in df.columns and not compact:
         df["result"] = df["result"].astype(str)
 
     # Añadir columna de tipo binario éxito
     if "result" in df.columns:
-        df["is_goal"] = df["result"].str.lower().eq("goal")
+        df["is_goal"] = df["result"].str.lower().eq("goal").fillna(False).astype(bool)
     else:
         df["is_goal"] = False
 
+    if compact:
+        df = compact_shots(df)
     return df
 
 
+def load_shots_streaming(csv_path, chunksize: int = None, bins: int = 10):
+    """Variante de ``load_shots`` para CSV más grandes que la RAM.
+
+    Lee el archivo por chunks y devuelve un ``ShotAggregates`` (ver
+    ``src.streaming``) en lugar del DataFrame. Ese objeto puede pasarse a
+    ``calculate_shooting_efficiency``, ``identify_goal_zones``,
+    ``analyze_by_season`` y ``analyze_by_match``.
+    """
+    from src.streaming import DEFAULT_CHUNK_SIZE, stream_shots
+    return stream_shots(csv_path, chunksize=chunksize or DEFAULT_CHUNK_SIZE, bins=bins)
+
+
+def _is_aggregates(df) -> bool:
+    """True si ``df`` son agregados (``ShotAggregates`` o ``ShotCube``) en vez de tiros."""
+    from src.cube import ShotCube
+    from src.streaming import ShotAggregates
+    return isinstance(df, (ShotAggregates, ShotCube))
+
+
+def _columns(df):
+    """Columnas de un DataFrame de tiros o dimensiones de unos agregados."""
+    return df.dimensions if _is_aggregates(df) else df.columns
+
+
+def build_shot_cube(df: pd.DataFrame):
+    """Construye el ``ShotCube`` de un dataset (ver ``src.cube``).
+
+    El cubo puede pasarse en lugar de los tiros a ``calculate_shooting_efficiency``,
+    ``get_stats_with_overrides``, ``compare_teams``, ``compare_players``,
+    ``analyze_by_match`` y ``analyze_by_season``; filtrar con ``cube.filter(...)``.
+    """
+    from src.cube import ShotCube
+    return ShotCube.from_shots(df)
+
+
+def compact_shots(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte un DataFrame de tiros a su representación compacta.
+
+    - Columnas de texto (``CATEGORICAL_COLUMNS``) a ``category``: los groupby
+      trabajan sobre códigos enteros en lugar de comparar cadenas.
+    - ``x``/``y`` a float32, ``minute`` a int16 (Int16 si tiene nulos), ``is_goal`` a bool.
+
+    Returns:
+        Nuevo DataFrame; el original no se modifica.
+    """
+    out = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype('category')
+    for col in ('x', 'y'):
+        if col in out.columns:
+            out[col] = pd.to_numeric(out[col], errors='coerce').astype('float32')
+    if 'minute' in out.columns:
+        minute = pd.to_numeric(out['minute'], errors='coerce')
+        out['minute'] = minute.astype('Int16' if minute.isna().any() else 'int16')
+    if 'is_goal' in out.columns:
+        out['is_goal'] = out['is_goal'].fillna(False).astype(bool)
+    return out
+
+
+def shots_memory_footprint(df: pd.DataFrame) -> dict:
+    """Memoria ocupada por un DataFrame de tiros.
+
+    Returns:
+        {'total_bytes': int, 'total_mb': float, 'per_column': {columna: bytes}}
+    """
+    usage = df.memory_usage(deep=True, index=True)
+    total = int(usage.sum())
+    return {
+        'total_bytes': total,
+        'total_mb': round(total / (1024 ** 2), 2),
+        'per_column': {str(col): int(nbytes) for col, nbytes in usage.items()},
+    }
+
+
 def calculate_shooting_efficiency(df: pd.DataFrame, group_by: str = None) -> pd.DataFrame:
     """Calcula la eficacia de tiros (% de goles) por equipo o jugador.
     
@@ -41,6 +160,9 @@ def calculate_shooting_efficiency(df: pd.DataFrame, group_by: str = None) -> pd.
     Returns:
         DataFrame con total de tiros, goles y eficacia (%).
     """
+    if _is_aggregates(df):
+        return df.efficiency(group_by)
+
     if group_by is None:
         total_shots = len(df)
         total_goals = df['is_goal'].sum()
@@ -51,7 +173,7 @@ def calculate_shooting_efficiency(df: pd.DataFrame, group_by: str = None) -> pd.
             'efficiency_%': [efficiency]
         })
     
-    grouped = df.groupby(group_by).agg({
+    grouped = df.groupby(group_by, observed=True).agg({
         'is_goal': ['sum', 'count']
     }).reset_index()
     grouped.columns = [group_by, 'goals', 'total_shots']
@@ -62,7 +184,10 @@ def calculate_shooting_efficiency(df: pd.DataFrame, group_by: str = None) -> pd.
 
 def identify_goal_zones(df: pd.DataFrame, bins: int = 10, min_shots: int = 1) -> pd.DataFrame:
     """Identifica zonas del campo con mayor probabilidad de gol.
-    
+
+    Las zonas son celdas de una rejilla fija sobre la escala 0-100 del campo
+    (ver ``src.zones``), así que son comparables entre filtros.
+
     Args:
         df: DataFrame con tiros.
         bins: Número de divisiones del campo (bins x bins).
@@ -71,26 +196,47 @@ def identify_goal_zones(df: pd.DataFrame, bins: int = 10, min_shots: int = 1) ->
     Returns:
         DataFrame con zona (x_bin, y_bin), total tiros, goles y probabilidad.
     """
-    df_valid = df[['x', 'y', 'is_goal']].dropna()
-    
-    # Crear bins para x e y
-    df_valid['x_bin'] = pd.cut(df_valid['x'], bins=bins, labels=False)
-    df_valid['y_bin'] = pd.cut(df_valid['y'], bins=bins, labels=False)
-    
-    # Agrupar por zona
-    zones = df_valid.groupby(['x_bin', 'y_bin']).agg({
-        'is_goal': ['sum', 'count']
-    }).reset_index()
-    zones.columns = ['x_bin', 'y_bin', 'goals', 'total_shots']
-    
-    # Filtrar zonas con mínimo de tiros
-    zones = zones[zones['total_shots'] >= min_shots]
-    
-    # Calcular probabilidad de gol
-    zones['goal_probability_%'] = (zones['goals'] / zones['total_shots'] * 100).round(2)
-    zones = zones.sort_values('goal_probability_%', ascending=False)
-    
-    return zones
+    from src.zones import zones_frame
+    return zones_frame(goal_zone_grid(df, bins=bins), min_shots=min_shots)
+
+
+def goal_zone_grid(df: pd.DataFrame, bins: int = 10) -> dict:
+    """Conteos de tiros y goles por zona como matrices densas ``bins x bins``.
+
+    Args:
+        df: DataFrame con tiros o ``ShotAggregates``.
+        bins: Número de divisiones del campo por lado.
+
+    Returns:
+        {'bins': int, 'shots': ndarray, 'goals': ndarray} indexados ``[y_bin, x_bin]``.
+    """
+    if _is_aggregates(df):
+        if not hasattr(df, 'zone_grid'):
+            raise TypeError('Las zonas necesitan coordenadas: usa los tiros o ShotAggregates')
+        if bins != df.bins:
+            raise ValueError(f'Los agregados se calcularon con bins={df.bins}, no {bins}')
+        return df.zone_grid()
+
+    from src.zones import zone_grid
+    return zone_grid(df, bins=bins)
+
+
+def goal_zone_matrices(df: pd.DataFrame, bins: int = 10, min_shots: int = 1) -> dict:
+    """Matrices densas de tiros, goles y probabilidad de gol por zona.
+
+    Es la misma información que ``identify_goal_zones`` en formato de
+    rejilla, lista para dibujar; ``zones_frame`` la pasa a formato largo.
+
+    Args:
+        df: DataFrame con tiros o ``ShotAggregates``.
+        bins: Número de divisiones del campo por lado.
+        min_shots: Mínimo de tiros en una zona; por debajo la probabilidad es NaN.
+
+    Returns:
+        {'bins', 'min_shots', 'shots', 'goals', 'probability'} indexados ``[y_bin, x_bin]``.
+    """
+    from src.zones import zone_matrices
+    return zone_matrices(goal_zone_grid(df, bins=bins), min_shots=min_shots)
 
 
 def compare_teams(df: pd.DataFrame) -> pd.DataFrame:
@@ -99,7 +245,7 @@ def compare_teams(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame con estadísticas de cada equipo.
     """
-    if 'team' not in df.columns:
+    if 'team' not in _columns(df):
         return pd.DataFrame()
     
     return calculate_shooting_efficiency(df, group_by='team')
@@ -115,7 +261,7 @@ def compare_players(df: pd.DataFrame, min_shots: int = 3) -> pd.DataFrame:
     Returns:
         DataFrame con estadísticas de cada jugador.
     """
-    if 'player' not in df.columns:
+    if 'player' not in _columns(df):
         return pd.DataFrame()
     
     efficiency = calculate_shooting_efficiency(df, group_by='player')
@@ -129,10 +275,13 @@ def analyze_by_match(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame con estadísticas de cada partido.
     """
+    if _is_aggregates(df):
+        return df.by_match()
+
     if 'match_id' not in df.columns:
         return calculate_shooting_efficiency(df)
     
-    grouped = df.groupby('match_id').agg({
+    grouped = df.groupby('match_id', observed=True).agg({
         'is_goal': ['sum', 'count'],
         'team': 'first',
         'opponent': 'first'
@@ -149,6 +298,9 @@ def analyze_by_season(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame con estadísticas de cada temporada.
     """
+    if _is_aggregates(df):
+        return df.efficiency('season' if 'season' in df.dimensions else None)
+
     if 'season' not in df.columns:
         return calculate_shooting_efficiency(df)
     
@@ -156,12 +308,21 @@ def analyze_by_season(df: pd.DataFrame) -> pd.DataFrame:
 
 
 # ------------------ Overrides / Edición de estadísticas ------------------
+import copy
 import json
+import threading
 from pathlib import Path
 
 OVERRIDES_FILE = 'data/stats_overrides.json'
 
 
+# Overrides parseados: se releen solo si cambia mtime/tamaño del archivo
+_overrides_cache = {'stat': None, 'overrides': {}, 'frame': None}
+# La precarga en segundo plano lee los overrides desde otros hilos
+_overrides_lock = threading.Lock()
+OVERRIDE_COLUMNS = ['goals', 'total_shots', 'efficiency_%']
+
+
 def _ensure_overrides_file():
     Path('data').mkdir(exist_ok=True)
     if not Path(OVERRIDES_FILE).exists():
@@ -169,21 +330,57 @@ def _ensure_overrides_file():
             json.dump({}, f)
 
 
+def _overrides_frame(overrides: dict) -> pd.DataFrame:
+    """Overrides por grupo ('team:X', 'player:Y') como DataFrame indexado por llave.
+
+    Las métricas no definidas en un override quedan como NaN.
+    """
+    rows = {key: value for key, value in overrides.items() if ':' in key and isinstance(value, dict)}
+    frame = pd.DataFrame.from_dict(rows, orient='index').reindex(columns=OVERRIDE_COLUMNS)
+    return frame.apply(pd.to_numeric, errors='coerce').astype('float64')
+
+
+def _load_overrides_cached() -> dict:
+    """Devuelve una copia coherente de la caché de overrides, releyendo el JSON solo si cambió."""
+    with _overrides_lock:
+        _ensure_overrides_file()
+        st = os.stat(OVERRIDES_FILE)
+        stat = (st.st_mtime_ns, st.st_size)
+        if _overrides_cache['stat'] != stat:
+            with open(OVERRIDES_FILE, 'r') as f:
+                try:
+                    overrides = json.load(f)
+                except json.JSONDecodeError:
+                    overrides = {}
+            _overrides_cache.update(stat=stat, overrides=overrides, frame=_overrides_frame(overrides))
+        # Copia superficial: stat, overrides y frame siempre de la misma lectura
+        return dict(_overrides_cache)
+
+
 def load_stats_overrides() -> dict:
     """Carga overrides de estadísticas (si existen)."""
-    _ensure_overrides_file()
-    with open(OVERRIDES_FILE, 'r') as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+    return copy.deepcopy(_load_overrides_cached()['overrides'])
+
+
+def overrides_version() -> tuple:
+    """Versión (mtime_ns, tamaño) del archivo de overrides; cambia al guardarlo."""
+    return _load_overrides_cached()['stat']
 
 
 def save_stats_overrides(overrides: dict):
     """Guarda los overrides de estadísticas en disco."""
-    _ensure_overrides_file()
-    with open(OVERRIDES_FILE, 'w') as f:
-        json.dump(overrides, f, indent=2)
+    with _overrides_lock:
+        _ensure_overrides_file()
+        with open(OVERRIDES_FILE, 'w') as f:
+            json.dump(overrides, f, indent=2)
+        _overrides_cache['stat'] = None
+
+
+def _as_int_if_whole(values: np.ndarray) -> np.ndarray:
+    """Convierte a int64 cuando todos los valores son enteros (conteos)."""
+    if np.all(np.mod(values, 1) == 0):
+        return values.astype('int64')
+    return values
 
 
 def get_stats_with_overrides(df: pd.DataFrame, group_by: str = None) -> pd.DataFrame:
@@ -197,8 +394,10 @@ def get_stats_with_overrides(df: pd.DataFrame, group_by: str = None) -> pd.DataF
     }
 
     Los valores en overrides reemplazan los calculados. Si se provee solo 'goals', se recalcula 'efficiency_%' cuando sea aplicable.
+    Los overrides por grupo se aplican con un único reindex vectorizado sobre la tabla agrupada.
     """
-    overrides = load_stats_overrides()
+    cached = _load_overrides_cached()
+    overrides = cached['overrides']
 
     if group_by is None:
         base = calculate_shooting_efficiency(df, group_by=None)
@@ -213,18 +412,20 @@ def get_stats_with_overrides(df: pd.DataFrame, group_by: str = None) -> pd.DataF
     # Agrupar y luego aplicar overrides por llave (p.ej. 'team:TeamName' o 'player:PlayerName')
     grouped = calculate_shooting_efficiency(df, group_by=group_by)
     # grouped has columns [group_by, 'goals', 'total_shots', 'efficiency_%']
-    def _apply_row_override(row):
-        key = f"{group_by}:{row[group_by]}"
-        if key in overrides:
-            ov = overrides[key]
-            goals = ov.get('goals', int(row['goals']))
-            total_shots = ov.get('total_shots', int(row['total_shots']))
-            efficiency = ov.get('efficiency_%', (goals / total_shots * 100) if total_shots > 0 else 0)
-            row['goals'] = goals
-            row['total_shots'] = total_shots
-            row['efficiency_%'] = round(efficiency, 2)
-        return row
+    frame = cached['frame']
+    if len(frame) > 0 and len(grouped) > 0:
+        keys = (group_by + ':' + grouped[group_by].astype(str)).to_numpy()
+        hit = pd.Index(keys).isin(frame.index)
+        if hit.any():
+            ov = frame.reindex(keys)
+            goals = ov['goals'].fillna(grouped['goals'].set_axis(ov.index)).to_numpy(dtype='float64')
+            shots = ov['total_shots'].fillna(grouped['total_shots'].set_axis(ov.index)).to_numpy(dtype='float64')
+            computed = np.divide(goals, shots, out=np.zeros_like(goals), where=shots > 0) * 100
+            efficiency = np.where(ov['efficiency_%'].isna(), computed, ov['efficiency_%'].to_numpy())
+            grouped = grouped.copy()
+            grouped['goals'] = _as_int_if_whole(goals)
+            grouped['total_shots'] = _as_int_if_whole(shots)
+            grouped['efficiency_%'] = np.where(hit, efficiency.round(2), grouped['efficiency_%'].to_numpy())
 
-    grouped = grouped.apply(_apply_row_override, axis=1)
     grouped = grouped.sort_values('efficiency_%', ascending=False).reset_index(drop=True)
     return grouped
@@ -0,0 +1,223 @@
+"""Caché de figuras renderizadas, compartida por todas las sesiones.
+
+Cada figura se identifica por el ámbito de datos (huella del dataset, estado
+de filtros y versión de overrides, es decir la clave del grafo de cálculos),
+los datos que dibuja (nombre y parámetros del producto del grafo), la función
+que la dibuja y sus parámetros. La clave incluye además una versión del
+código (``FIGURE_CACHE_VERSION``, versión de Plotly y huella de todos los
+módulos del paquete de la función: visuales, zonas, datos, overrides...), de
+modo que un despliegue no sirve figuras antiguas desde disco.
+Se guarda serializada como JSON de Plotly; al reutilizarla se reconstruye sin
+volver a validar cada propiedad.
+
+La memoria está acotada por un presupuesto en bytes con desalojo LRU.
+Opcionalmente (``SHOTS_FIGURE_CACHE_DIR``) las figuras se escriben también en
+disco y sobreviven a un reinicio de la app.
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import plotly
+import plotly.graph_objects as go
+
+DEFAULT_BUDGET_MB = int(os.environ.get('SHOTS_FIGURE_CACHE_MB', '64'))
+DEFAULT_DIRECTORY = os.environ.get('SHOTS_FIGURE_CACHE_DIR') or None
+
+
+KEY_TYPES = (str, int, float, bool, type(None))
+
+# Subir al cambiar el formato de las figuras guardadas
+FIGURE_CACHE_VERSION = 2
+
+
+def data_token(data):
+    """Identidad normalizada de los datos de una figura.
+
+    Args:
+        data: Nombre de producto, ``(nombre, {params})`` o lista de ellos,
+            p. ej. ``('stats', {'group_by': 'team'})``.
+
+    Raises:
+        TypeError: Si ``data`` está vacío o contiene algo que no es escalar
+            (p. ej. un DataFrame en lugar de su nombre de producto).
+    """
+    if isinstance(data, dict):
+        return tuple(sorted((k, data_token(v)) for k, v in data.items()))
+    if isinstance(data, (list, tuple)):
+        if not data:
+            raise TypeError('La identidad de los datos de la figura no puede estar vacía')
+        return tuple(data_token(v) for v in data)
+    if isinstance(data, KEY_TYPES) and data is not None:
+        return data
+    raise TypeError(f'Identidad de datos no válida para la caché de figuras: {type(data).__name__}')
+
+
+@lru_cache(maxsize=None)
+def code_version(module_name: str) -> str:
+    """Huella del código de las figuras más versiones de caché y de Plotly.
+
+    Se resume todo el paquete de ``module_name`` (p. ej. todo ``src``): las
+    figuras dependen también del binning, la densidad o los overrides de otros
+    módulos.
+    """
+    package = module_name.split('.')[0]
+    digest = hashlib.sha1()
+    try:
+        root = Path(inspect.getsourcefile(sys.modules[package])).parent
+        for path in sorted(root.rglob('*.py')):
+            digest.update(str(path.relative_to(root)).encode('utf-8'))
+            digest.update(path.read_bytes())
+    except (KeyError, TypeError, OSError):
+        pass
+    return f'{FIGURE_CACHE_VERSION}:{plotly.__version__}:{digest.hexdigest()[:12]}'
+
+
+def figure_key(scope, data, plot, params: dict) -> str:
+    """Clave estable (SHA-1) de una figura; válida también entre reinicios.
+
+    Args:
+        scope: Ámbito de los datos (clave del grafo de cálculos).
+        data: Identidad de los datos dibujados (ver ``data_token``).
+        plot: Función que dibuja la figura.
+        params: Parámetros de ``plot``. Solo entran los escalares; el resto
+            (DataFrames, matrices...) deben quedar determinados por ``data``.
+    """
+    key_params = tuple(sorted((k, v) for k, v in params.items() if isinstance(v, KEY_TYPES)))
+    raw = repr((code_version(plot.__module__), scope, data_token(data), plot.__qualname__, key_params))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def figure_from_json(spec: str) -> go.Figure:
+    """Reconstruye una figura serializada sin validar de nuevo sus propiedades."""
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+class FigureCache:
+    """JSON de figuras por clave, con presupuesto de memoria y desalojo LRU."""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_MB * 1024 ** 2, directory=DEFAULT_DIRECTORY):
+        self.budget_bytes = budget_bytes
+        self.directory = Path(directory) if directory else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _disk_path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    def _read_disk(self, key: str):
+        if self.directory is None:
+            return None
+        try:
+            return self._disk_path(key).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, spec: str):
+        if self.directory is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._disk_path(key)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_text(spec, encoding='utf-8')
+            os.replace(tmp, path)
+            self._prune_disk()
+        except OSError:
+            # El disco es opcional: la figura sigue en memoria
+            pass
+
+    def _prune_disk(self):
+        """Borra los ficheros más antiguos cuando el directorio supera el presupuesto."""
+        files = sorted(self.directory.glob('*.json'), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.budget_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+
+    def _store(self, key: str, spec: str):
+        with self._lock:
+            self._entries[key] = spec
+            self._entries.move_to_end(key)
+            while self.total_bytes() > self.budget_bytes and len(self._entries) > 1:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_render(self, key: str, render) -> go.Figure:
+        """Figura ``key`` desde la caché, o ``render()`` si no está.
+
+        Args:
+            key: Clave de ``figure_key``.
+            render: Función sin argumentos que devuelve la figura.
+        """
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return figure_from_json(spec)
+
+        spec = self._read_disk(key)
+        if spec is not None:
+            with self._lock:
+                self.hits += 1
+            self._store(key, spec)
+            return figure_from_json(spec)
+
+        fig = render()
+        spec = fig.to_json()
+        with self._lock:
+            self.misses += 1
+        self._store(key, spec)
+        self._write_disk(key, spec)
+        return fig
+
+    def total_bytes(self) -> int:
+        return sum(len(spec) for spec in self._entries.values())
+
+    def stats(self) -> dict:
+        """Resumen de la caché para mostrar en la app."""
+        with self._lock:
+            return {
+                'figures': len(self._entries),
+                'total_mb': round(self.total_bytes() / 1024 ** 2, 2),
+                'budget_mb': round(self.budget_bytes / 1024 ** 2, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk': str(self.directory) if self.directory else None,
+            }
+
+
+# Instancia única por proceso, compartida por todas las sesiones de Streamlit
+FIGURES = FigureCache()
+
+
+def cached_figure(scope, data, plot, *args, cache: FigureCache = None, **params) -> go.Figure:
+    """Dibuja ``plot(*args, **params)`` pasando por la caché de figuras.
+
+    Los argumentos posicionales y los parámetros no escalares son los datos:
+    no entran en la clave tal cual, así que ``data`` debe identificarlos (el
+    producto del grafo del que salen y sus parámetros). Los parámetros
+    escalares (equipo, bins, métrica...) entran en la clave.
+
+    Args:
+        scope: Ámbito de los datos, p. ej. la clave del grafo de cálculos.
+        data: Identidad de los datos, p. ej. ``('stats', {'group_by': 'team'})``.
+        plot: Función de ``src.visuals`` que devuelve una figura de Plotly.
+        cache: Caché a usar (por defecto ``FIGURES``).
+    """
+    cache = cache or FIGURES
+    key = figure_key(scope, data, plot, params)
+    return cache.get_or_render(key, lambda: plot(*args, **params))
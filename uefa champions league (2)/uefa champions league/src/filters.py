@@ -0,0 +1,81 @@
+"""Índice de filtros por posición de fila.
+
+Se construye una vez por dataset: para cada valor de temporada, equipo,
+jugador, partido, situación y tipo de tiro guarda las posiciones (ordenadas)
+de sus filas. Una combinación de filtros se resuelve intersectando esos
+conjuntos, sin comparar cadenas ni copiar el DataFrame completo.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ('season', 'team', 'player', 'match_id', 'situation', 'shot_type')
+
+
+class FilterIndex:
+    """Posiciones de fila por valor de cada columna filtrable."""
+
+    def __init__(self, positions: dict, n_rows: int):
+        self.positions = positions
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_shots(cls, df: pd.DataFrame, columns=FILTER_COLUMNS) -> 'FilterIndex':
+        """Construye el índice con un groupby por columna presente en ``df``."""
+        positions = {}
+        for col in columns:
+            if col in df.columns:
+                indices = df.groupby(col, observed=True, sort=True).indices
+                positions[col] = {value: pos.astype(np.int64) for value, pos in indices.items()}
+        return cls(positions, len(df))
+
+    @property
+    def columns(self) -> tuple:
+        return tuple(self.positions)
+
+    def values(self, column: str) -> list:
+        """Valores distintos (no nulos, ordenados) de una columna indexada."""
+        return list(self.positions.get(column, {}))
+
+    def _rows_for(self, column: str, value) -> np.ndarray:
+        by_value = self.positions[column]
+        if isinstance(value, (list, tuple, set)):
+            parts = [by_value[v] for v in value if v in by_value]
+            if not parts:
+                return np.empty(0, dtype=np.int64)
+            return np.unique(np.concatenate(parts))
+        return by_value.get(value, np.empty(0, dtype=np.int64))
+
+    def select(self, **filters):
+        """Posiciones de las filas que cumplen todos los filtros.
+
+        Cada filtro es ``columna=valor`` o ``columna=[valores]`` (selección
+        múltiple); ``None`` significa sin filtro.
+
+        Returns:
+            Array ordenado de posiciones, o None si no hay ningún filtro activo.
+        """
+        sets = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in self.positions:
+                raise KeyError(f"'{column}' no está indexada {self.columns}")
+            sets.append(self._rows_for(column, value))
+        if not sets:
+            return None
+        # Intersectar empezando por el conjunto más pequeño
+        sets.sort(key=len)
+        return reduce(lambda acc, rows: np.intersect1d(acc, rows, assume_unique=True), sets)
+
+    def apply(self, df: pd.DataFrame, **filters) -> pd.DataFrame:
+        """Filas de ``df`` que cumplen los filtros.
+
+        Sin filtros activos devuelve ``df`` tal cual (sin copia); con filtros
+        solo se materializan las filas seleccionadas.
+        """
+        rows = self.select(**filters)
+        if rows is None:
+            return df
+        return df.take(rows)
@@ -0,0 +1,207 @@
+"""Registro de datasets compartido por todas las sesiones del proceso.
+
+Streamlit ejecuta cada sesión en un hilo del mismo proceso, así que un
+registro a nivel de módulo permite que todas compartan una única copia de
+cada dataset (clave: SHA-256 del CSV) y de sus derivados (cubo, índice de
+filtros...). Los datasets cargados desde rutas del servidor quedan fijados;
+los subidos por usuarios se desalojan por LRU cuando se supera el
+presupuesto de memoria.
+
+Los DataFrames compartidos se tratan como inmutables. La app activa
+copy-on-write de pandas al arrancar (``enable_copy_on_write``) para que una
+modificación en una sesión produzca una copia propia; importar este módulo no
+cambia la configuración de pandas del proceso.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUDGET_MB = int(os.environ.get('SHOTS_REGISTRY_BUDGET_MB', '2048'))
+
+def enable_copy_on_write():
+    """Activa copy-on-write de pandas en todo el proceso.
+
+    Lo llama la app al arrancar: con datasets compartidos entre sesiones, una
+    escritura accidental sobre un frame compartido debe producir una copia y
+    no modificar el de las demás sesiones. Afecta a todo el código pandas del
+    proceso, por eso no se hace al importar. En pandas 3 ya es el único modo.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+def estimate_nbytes(obj, _seen=None) -> int:
+    """Estimación de la memoria de un objeto (DataFrames, arrays y contenedores)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v, _seen) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(estimate_nbytes(v, _seen) for v in obj)
+    if hasattr(obj, '__dict__'):
+        return estimate_nbytes(vars(obj), _seen)
+    return 0
+
+
+class DatasetRegistry:
+    """Datasets de solo lectura por huella de contenido, con desalojo LRU."""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_MB * 1024 ** 2):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._sources = {}
+        self._lock = threading.RLock()
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._loading.setdefault(key, threading.Lock())
+
+    def get_or_load(self, key: str, loader, pinned: bool = False, source: str = None) -> pd.DataFrame:
+        """Devuelve el dataset ``key``, cargándolo con ``loader()`` una sola vez.
+
+        Args:
+            key: Huella de contenido del dataset.
+            loader: Función sin argumentos que devuelve el DataFrame.
+            pinned: Si True, nunca se desaloja por presupuesto.
+            source: Ruta de origen; al cambiar su contenido se libera la versión anterior.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['df']
+
+        # Un único hilo carga cada clave; el resto espera y reutiliza el resultado
+        with self._entry_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry['df']
+            df = loader()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = {
+                    'df': df,
+                    'derived': {},
+                    'nbytes': estimate_nbytes(df),
+                    'pinned': pinned,
+                }
+                if source is not None:
+                    previous = self._sources.get(source)
+                    if previous is not None and previous != key:
+                        self._drop(previous)
+                    self._sources[source] = key
+                self._enforce_budget(keep=key)
+                self._loading.pop(key, None)
+            return df
+
+    def derived(self, key: str, name: str, builder, df: pd.DataFrame = None):
+        """Objeto derivado del dataset ``key`` (p. ej. cubo o índice), construido una vez.
+
+        Args:
+            key: Huella del dataset.
+            name: Nombre del derivado.
+            builder: Función ``builder(df)`` que lo construye.
+            df: El DataFrame del dataset. Si otra sesión desalojó ``key`` entre
+                la carga y esta llamada, el derivado se construye con él sin
+                registrarlo.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and name in entry['derived']:
+                self._entries.move_to_end(key)
+                return entry['derived'][name]
+            if entry is not None:
+                df = entry['df']
+            elif df is None:
+                raise KeyError(f"Dataset '{key}' no registrado (o desalojado)")
+        value = builder(df)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return value
+            value = entry['derived'].setdefault(name, value)
+            entry['nbytes'] += estimate_nbytes(value)
+            self._enforce_budget(keep=key)
+        return value
+
+    def _drop(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.evictions += 1
+
+    def _enforce_budget(self, keep: str = None):
+        """Desaloja datasets no fijados, del menos al más recientemente usado."""
+        for key in list(self._entries):
+            if self.total_bytes() <= self.budget_bytes:
+                break
+            if key == keep or self._entries[key]['pinned']:
+                continue
+            self._drop(key)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry['nbytes'] for entry in self._entries.values())
+
+    def stats(self) -> dict:
+        """Resumen del registro para mostrar en la app."""
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'total_mb': round(self.total_bytes() / 1024 ** 2, 2),
+                'budget_mb': round(self.budget_bytes / 1024 ** 2, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# Instancia única por proceso, compartida por todas las sesiones de Streamlit
+DATASETS = DatasetRegistry()
+
+
+def load_dataset(source, registry: DatasetRegistry = None):
+    """Carga un CSV de tiros a través del registro compartido.
+
+    Args:
+        source: Ruta del CSV o archivo subido (objeto con ``read``/``getvalue``).
+        registry: Registro a usar (por defecto ``DATASETS``).
+
+    Returns:
+        (key, df): huella de contenido y DataFrame compartido (no modificar).
+    """
+    from src.data import load_shots
+
+    registry = registry or DATASETS
+    if isinstance(source, (str, os.PathLike)):
+        from src.cache import source_fingerprint
+        key = source_fingerprint(source)
+        df = registry.get_or_load(key, lambda: load_shots(source), pinned=True, source=os.path.abspath(source))
+        return key, df
+
+    raw = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+    if isinstance(raw, str):
+        raw = raw.encode()
+    key = hashlib.sha256(raw).hexdigest()
+    df = registry.get_or_load(key, lambda: load_shots(io.BytesIO(raw)))
+    return key, df
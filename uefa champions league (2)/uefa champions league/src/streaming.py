@@ -0,0 +1,123 @@
+"""Ingesta por chunks para CSV de tiros que no caben en memoria.
+
+El CSV se lee en bloques de tamaño acotado y cada bloque se pliega en
+agregados acumulados (tiros y goles por equipo/jugador/temporada/partido y
+una rejilla de zonas fija sobre la cancha 0-100). El DataFrame completo nunca
+llega a construirse; solo viven en memoria el chunk actual y los agregados.
+"""
+import numpy as np
+import pandas as pd
+
+from src.zones import zone_grid, zones_frame
+
+DEFAULT_CHUNK_SIZE = 200_000
+STREAM_DIMENSIONS = ('team', 'player', 'season', 'match_id')
+
+
+def _efficiency_frame(counts: pd.DataFrame, group_by: str) -> pd.DataFrame:
+    """Da a unos conteos indexados por grupo el formato de calculate_shooting_efficiency."""
+    grouped = counts.sort_index().rename_axis(group_by).reset_index()
+    grouped['goals'] = grouped['goals'].astype('int64')
+    grouped['total_shots'] = grouped['total_shots'].astype('int64')
+    grouped['efficiency_%'] = (grouped['goals'] / grouped['total_shots'] * 100).round(2)
+    grouped = grouped.sort_values('efficiency_%', ascending=False)
+    return grouped
+
+
+class ShotAggregates:
+    """Agregados acumulados de un CSV de tiros leído por chunks.
+
+    Responde a las mismas consultas que ``calculate_shooting_efficiency``,
+    ``identify_goal_zones``, ``analyze_by_season`` y ``analyze_by_match`` sin
+    tener los tiros en memoria. Las zonas usan una rejilla fija de
+    ``bins x bins`` sobre la escala 0-100 del campo.
+    """
+
+    def __init__(self, bins: int = 10):
+        self.bins = bins
+        self.total_shots = 0
+        self.total_goals = 0
+        self.chunks = 0
+        self.groups = {}
+        self.match_info = None
+        self.zone_shots = np.zeros((bins, bins), dtype=np.int64)
+        self.zone_goals = np.zeros((bins, bins), dtype=np.int64)
+
+    @property
+    def dimensions(self) -> tuple:
+        """Dimensiones presentes en el CSV procesado."""
+        return tuple(self.groups)
+
+    def update(self, chunk: pd.DataFrame):
+        """Pliega un chunk ya normalizado (con ``is_goal``) en los agregados."""
+        self.chunks += 1
+        self.total_shots += len(chunk)
+        self.total_goals += int(chunk['is_goal'].sum())
+
+        for dim in STREAM_DIMENSIONS:
+            if dim not in chunk.columns:
+                continue
+            counts = chunk.groupby(dim, observed=True)['is_goal'].agg(goals='sum', total_shots='count')
+            if dim in self.groups:
+                counts = self.groups[dim].add(counts, fill_value=0)
+            self.groups[dim] = counts
+
+        if 'match_id' in chunk.columns and {'team', 'opponent'} <= set(chunk.columns):
+            info = chunk.groupby('match_id', observed=True)[['team', 'opponent']].first()
+            # combine_first conserva lo ya visto: equivale al 'first' sobre todo el CSV
+            self.match_info = info if self.match_info is None else self.match_info.combine_first(info)
+
+        if {'x', 'y'} <= set(chunk.columns):
+            grid = zone_grid(chunk, self.bins)
+            self.zone_shots += grid['shots']
+            self.zone_goals += grid['goals']
+
+    def efficiency(self, group_by: str = None) -> pd.DataFrame:
+        """Equivalente a ``calculate_shooting_efficiency`` sobre los agregados."""
+        if group_by is None:
+            efficiency = (self.total_goals / self.total_shots * 100) if self.total_shots > 0 else 0
+            return pd.DataFrame({
+                'total_shots': [self.total_shots],
+                'goals': [self.total_goals],
+                'efficiency_%': [efficiency]
+            })
+        if group_by not in self.groups:
+            raise KeyError(f"'{group_by}' no se agregó durante la ingesta (disponibles: {self.dimensions})")
+        return _efficiency_frame(self.groups[group_by], group_by)
+
+    def by_match(self) -> pd.DataFrame:
+        """Equivalente a ``analyze_by_match`` sobre los agregados."""
+        if 'match_id' not in self.groups:
+            return self.efficiency()
+        counts = self.groups['match_id'].sort_index()
+        if self.match_info is not None:
+            counts = counts.join(self.match_info)
+        return _efficiency_frame(counts, 'match_id')
+
+    def zone_grid(self) -> dict:
+        """Rejilla densa acumulada, en el formato de ``src.zones.zone_grid``."""
+        return {'bins': self.bins, 'shots': self.zone_shots, 'goals': self.zone_goals}
+
+    def goal_zones(self, min_shots: int = 1) -> pd.DataFrame:
+        """Zonas en formato largo, como ``identify_goal_zones``."""
+        return zones_frame(self.zone_grid(), min_shots=min_shots)
+
+
+def stream_shots(csv_path, chunksize: int = DEFAULT_CHUNK_SIZE, bins: int = 10) -> ShotAggregates:
+    """Lee un CSV de tiros por chunks y devuelve sus agregados.
+
+    Args:
+        csv_path: Ruta o archivo CSV de tiros.
+        chunksize: Filas por chunk (acota la memoria usada durante la lectura).
+        bins: Divisiones por lado de la rejilla de zonas.
+
+    Returns:
+        ShotAggregates con los conteos de todo el archivo.
+    """
+    from src.data import _normalize_shots
+
+    aggregates = ShotAggregates(bins=bins)
+    with pd.read_csv(csv_path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            aggregates.update(_normalize_shots(chunk))
+    return aggregates
@@ -0,0 +1,414 @@
+"""Backends de almacenamiento de usuarios.
+
+``src.auth`` trabaja contra una interfaz mínima (``get``, ``all``,
+``email_exists``, ``add``, ``add_many``, ``update``, ``update_many``,
+``signature``) con dos implementaciones:
+
+- ``JsonUserStore``: el ``data/users.json`` de siempre, ahora escrito de forma
+  atómica (fichero temporal + ``os.replace``).
+- ``SqliteUserStore``: SQLite embebido con clave primaria en ``username``,
+  índice único en ``email`` y cada actualización en su propia transacción.
+  La primera vez importa los usuarios del JSON (migración única).
+
+El backend se elige con la variable de entorno ``SHOTS_USER_STORE``
+(``sqlite`` por defecto, o ``json`` para seguir con el fichero único).
+
+Los metadatos no críticos (``last_login``) pasan por ``WriteBehindQueue``:
+se agrupan en memoria y se escriben en bloque cada pocos segundos y al
+cerrar el proceso. Contraseñas y permisos se escriben siempre en el momento.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+USERS_JSON = 'data/users.json'
+USERS_DB = 'data/users.db'
+DEFAULT_BACKEND = os.environ.get('SHOTS_USER_STORE', 'sqlite')
+DEFAULT_FLUSH_SECONDS = float(os.environ.get('SHOTS_USER_FLUSH_SECONDS', '5'))
+
+USER_FIELDS = ('email', 'password_hash', 'created_at', 'last_login', 'is_admin')
+
+
+class JsonUserStore:
+    """Usuarios en un único fichero JSON ``{username: {...}}``."""
+
+    backend = 'json'
+
+    def __init__(self, path: str = USERS_JSON):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        if not os.path.exists(self.path):
+            self._write({})
+
+    def _read(self) -> dict:
+        self._ensure()
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _write(self, users: dict):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(users, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def signature(self):
+        """(mtime, tamaño) del fichero; cambia con cada escritura, también de otros procesos."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, username: str):
+        return self._read().get(username)
+
+    def all(self) -> dict:
+        return self._read()
+
+    def email_exists(self, email: str) -> bool:
+        return any(user.get('email') == email for user in self._read().values())
+
+    def add(self, username: str, record: dict) -> bool:
+        """Añade un usuario; False si el nombre o el email ya existen."""
+        with self._lock:
+            users = self._read()
+            if username in users or any(user.get('email') == record['email'] for user in users.values()):
+                return False
+            users[username] = record
+            self._write(users)
+            return True
+
+    def add_many(self, records: dict) -> list:
+        """Añade ``{username: registro}`` con una sola escritura atómica.
+
+        Returns:
+            Usuarios rechazados porque el nombre o el email ya existían.
+        """
+        with self._lock:
+            users = self._read()
+            emails = {user.get('email') for user in users.values()}
+            rejected = []
+            for username, record in records.items():
+                if username in users or record['email'] in emails:
+                    rejected.append(username)
+                    continue
+                users[username] = record
+                emails.add(record['email'])
+            if len(rejected) < len(records):
+                self._write(users)
+            return rejected
+
+    def update(self, username: str, **fields) -> bool:
+        """Actualiza campos de un usuario; False si no existe."""
+        with self._lock:
+            users = self._read()
+            if username not in users:
+                return False
+            users[username].update(fields)
+            self._write(users)
+            return True
+
+    def update_many(self, updates: dict) -> int:
+        """Aplica ``{username: {campo: valor}}`` con una sola escritura.
+
+        Returns:
+            Número de usuarios actualizados (los inexistentes se ignoran).
+        """
+        with self._lock:
+            users = self._read()
+            updated = 0
+            for username, fields in updates.items():
+                if username in users:
+                    users[username].update(fields)
+                    updated += 1
+            if updated:
+                self._write(users)
+            return updated
+
+
+class SqliteUserStore:
+    """Usuarios en SQLite, una fila por usuario."""
+
+    backend = 'sqlite'
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TEXT,
+            last_login TEXT,
+            is_admin INTEGER NOT NULL DEFAULT 0
+        )""",
+        'CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email)',
+        'CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at TEXT, rows INTEGER)',
+        # Contador de cambios: lo suben los triggers en cada escritura, venga de donde venga
+        'CREATE TABLE IF NOT EXISTS store_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)',
+        'INSERT OR IGNORE INTO store_version (id, version) VALUES (1, 0)',
+        *(
+            f"""CREATE TRIGGER IF NOT EXISTS users_version_{event.lower()} AFTER {event} ON users
+            BEGIN UPDATE store_version SET version = version + 1 WHERE id = 1; END"""
+            for event in ('INSERT', 'UPDATE', 'DELETE')
+        ),
+    )
+
+    def __init__(self, path: str = USERS_DB, migrate_from: str = USERS_JSON):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+        if migrate_from:
+            self.migrate_from_json(migrate_from)
+
+    @contextmanager
+    def _connect(self):
+        """Conexión de una sola transacción (commit al salir, rollback si hay error)."""
+        # Una conexión por operación: Streamlit atiende cada sesión en su propio hilo
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record(row) -> dict:
+        record = {field: row[field] for field in USER_FIELDS}
+        record['is_admin'] = bool(record['is_admin'])
+        return record
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """Importa los usuarios de ``json_path`` una sola vez.
+
+        Returns:
+            Número de usuarios importados (0 si ya se migró o no hay JSON).
+        """
+        name = f'json:{os.path.abspath(json_path)}'
+        with self._connect() as conn:
+            if conn.execute('SELECT 1 FROM migrations WHERE name = ?', (name,)).fetchone():
+                return 0
+            users = {}
+            if os.path.exists(json_path):
+                with open(json_path, 'r') as f:
+                    users = json.load(f)
+            rows = [
+                (username, data['email'], data['password_hash'], data.get('created_at'),
+                 data.get('last_login'), int(bool(data.get('is_admin', False))))
+                for username, data in users.items()
+            ]
+            # INSERT OR IGNORE: usuarios ya presentes (o emails repetidos) no se duplican
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO users (username, email, password_hash, created_at, last_login, is_admin) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+            imported = conn.total_changes - before
+            conn.execute(
+                "INSERT INTO migrations (name, applied_at, rows) VALUES (?, datetime('now'), ?)",
+                (name, imported),
+            )
+        return imported
+
+    def signature(self):
+        """Contador de cambios de la tabla de usuarios (triggers); sube con cada escritura confirmada.
+
+        A diferencia de mtime/tamaño del fichero, no se pierde una escritura de
+        otro proceso que deje el mismo tamaño dentro del mismo tick de mtime.
+        """
+        with self._connect() as conn:
+            return conn.execute('SELECT version FROM store_version WHERE id = 1').fetchone()[0]
+
+    def get(self, username: str):
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        return self._record(row) if row else None
+
+    def all(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM users ORDER BY rowid').fetchall()
+        return {row['username']: self._record(row) for row in rows}
+
+    def email_exists(self, email: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute('SELECT 1 FROM users WHERE email = ?', (email,)).fetchone() is not None
+
+    def add(self, username: str, record: dict) -> bool:
+        """Añade un usuario; False si el nombre o el email ya existen."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT INTO users (username, email, password_hash, created_at, last_login, is_admin) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (username, record['email'], record['password_hash'], record.get('created_at'),
+                     record.get('last_login'), int(bool(record.get('is_admin', False)))),
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def add_many(self, records: dict) -> list:
+        """Añade ``{username: registro}`` en una sola transacción.
+
+        Returns:
+            Usuarios rechazados porque el nombre o el email ya existían.
+        """
+        rejected = []
+        with self._connect() as conn:
+            for username, record in records.items():
+                try:
+                    # Un INSERT fallido solo deshace esa sentencia, no la transacción
+                    conn.execute(
+                        'INSERT INTO users (username, email, password_hash, created_at, last_login, is_admin) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (username, record['email'], record['password_hash'], record.get('created_at'),
+                         record.get('last_login'), int(bool(record.get('is_admin', False)))),
+                    )
+                except sqlite3.IntegrityError:
+                    rejected.append(username)
+        return rejected
+
+    @staticmethod
+    def _assignments(fields: dict):
+        unknown = set(fields) - set(USER_FIELDS)
+        if unknown:
+            raise KeyError(f'Campos desconocidos: {sorted(unknown)}')
+        if 'is_admin' in fields:
+            fields = {**fields, 'is_admin': int(bool(fields['is_admin']))}
+        return ', '.join(f'{field} = ?' for field in fields), tuple(fields.values())
+
+    def update(self, username: str, **fields) -> bool:
+        """Actualiza campos de un usuario en una transacción; False si no existe."""
+        assignments, values = self._assignments(fields)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'UPDATE users SET {assignments} WHERE username = ?',
+                (*values, username),
+            )
+        return cursor.rowcount > 0
+
+    def update_many(self, updates: dict) -> int:
+        """Aplica ``{username: {campo: valor}}`` en una sola transacción.
+
+        Returns:
+            Número de usuarios actualizados (los inexistentes se ignoran).
+        """
+        updated = 0
+        with self._connect() as conn:
+            for username, fields in updates.items():
+                assignments, values = self._assignments(fields)
+                cursor = conn.execute(
+                    f'UPDATE users SET {assignments} WHERE username = ?',
+                    (*values, username),
+                )
+                updated += cursor.rowcount
+        return updated
+
+
+class WriteBehindQueue:
+    """Actualizaciones diferidas de metadatos, agrupadas por usuario.
+
+    ``put`` solo anota el cambio en memoria; varias actualizaciones del mismo
+    usuario antes de volcar se quedan en la última. ``flush`` las escribe con
+    un único ``update_many`` (una escritura atómica o una transacción). Un hilo
+    vuelca cada ``interval`` segundos y ``atexit`` vuelca lo pendiente al
+    cerrar el proceso. Hasta que la escritura termina, ``pending`` devuelve los
+    valores para que las lecturas los superpongan. ``store`` es cualquier
+    objeto con ``update_many``: un almacén o el directorio que lo envuelve.
+    """
+
+    def __init__(self, store, interval: float = DEFAULT_FLUSH_SECONDS):
+        self.store = store
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.queued = 0
+        self.flushes = 0
+        self.written = 0
+        atexit.register(self.flush)
+
+    def put(self, username: str, **fields):
+        """Anota ``fields`` para ``username``; se escriben en el próximo volcado."""
+        with self._lock:
+            self._pending.setdefault(username, {}).update(fields)
+            self.queued += 1
+            if self._thread is None and self.interval > 0:
+                self._thread = threading.Thread(target=self._run, name='user-write-behind', daemon=True)
+                self._thread.start()
+
+    def pending(self, username: str) -> dict:
+        """Campos de ``username`` aún sin escribir (copia)."""
+        with self._lock:
+            return dict(self._pending.get(username, {}))
+
+    def pending_all(self) -> dict:
+        with self._lock:
+            return {username: dict(fields) for username, fields in self._pending.items()}
+
+    def flush(self) -> int:
+        """Escribe lo pendiente de una vez.
+
+        Returns:
+            Número de usuarios actualizados.
+        """
+        with self._flush_lock:
+            batch = self.pending_all()
+            if not batch:
+                return 0
+            updated = self.store.update_many(batch)
+            with self._lock:
+                # Solo se descarta lo escrito; lo que llegó durante el volcado sigue pendiente
+                for username, fields in batch.items():
+                    current = self._pending.get(username, {})
+                    for field, value in fields.items():
+                        if current.get(field) == value:
+                            del current[field]
+                    if username in self._pending and not current:
+                        del self._pending[username]
+                self.flushes += 1
+                self.written += len(batch)
+        return updated
+
+    def _run(self):
+        while not self._wakeup.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # Se reintenta en el siguiente intervalo; lo pendiente no se pierde
+                continue
+
+    def stats(self) -> dict:
+        """Cambios anotados, pendientes, volcados y filas escritas."""
+        with self._lock:
+            return {'queued': self.queued, 'pending': len(self._pending),
+                    'flushes': self.flushes, 'written': self.written}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_user_store(backend: str = None):
+    """Store de usuarios del proceso para ``backend`` (por defecto ``SHOTS_USER_STORE``)."""
+    backend = backend or DEFAULT_BACKEND
+    with _stores_lock:
+        if backend not in _stores:
+            if backend == 'json':
+                _stores[backend] = JsonUserStore(USERS_JSON)
+            elif backend == 'sqlite':
+                _stores[backend] = SqliteUserStore(USERS_DB, migrate_from=USERS_JSON)
+            else:
+                raise ValueError(f"Backend de usuarios desconocido: '{backend}' (usa 'json' o 'sqlite')")
+        return _stores[backend]
@@ -1,51 +1,167 @@
+from functools import lru_cache
+
 import plotly.graph_objects as go
-import plotly.express as px
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
 
-def pitch_figure(width=700, height=450):
-    """Crea una figura base de cancha de fútbol con Plotly."""
-    fig = go.Figure()
-    fig.update_layout(
-        xaxis=dict(range=[0, 100], showgrid=False, zeroline=False, showticklabels=False),
+PITCH_GREEN = '#2b7a3a'
+
+
+def _pitch_line(x0, y0, x1, y1, kind='line', width=1):
+    return dict(type=kind, x0=x0, y0=y0, x1=x1, y1=y1, line=dict(color='white', width=width), layer='below')
+
+
+def _arc_path(cx, cy, radius, theta0, theta1, points=24):
+    """Arco como trazado SVG para usarlo en ``layout.shapes``."""
+    theta = np.linspace(theta0, theta1, points)
+    coords = [f'{cx + radius * np.cos(t):.2f},{cy + radius * np.sin(t):.2f}' for t in theta]
+    return 'M ' + ' L '.join(coords)
+
+
+@lru_cache(maxsize=None)
+def pitch_template(half: bool = False) -> go.layout.Template:
+    """Plantilla de layout con las marcas de la cancha, construida una sola vez.
+
+    Las líneas (incluidos los arcos del área, como trazados SVG) van en
+    ``template.layout.shapes``, así que las figuras no llevan trazas extra.
+    No debe modificarse: se comparte entre todas las figuras.
+
+    Args:
+        half: Si True, solo la mitad de ataque (x de 50 a 100).
+    """
+    x_min = 50 if half else 0
+    shapes = [
+        # Fondo/rectángulo principal (relleno con color césped)
+        dict(_pitch_line(x_min, 0, 100, 100, kind='rect', width=2), fillcolor=PITCH_GREEN),
+        # Línea de medio campo
+        _pitch_line(50, 0, 50, 100),
+        # Área derecha
+        _pitch_line(85, 20, 100, 80, kind='rect'),
+        _pitch_line(92, 40, 100, 60, kind='rect'),
+        dict(type='path', path=_arc_path(90, 50, 10, -0.6, 0.6), line=dict(color='white', width=1), layer='below'),
+    ]
+    if half:
+        # Medio círculo central del lado de ataque
+        shapes.append(dict(type='path', path=_arc_path(50, 50, 5, -np.pi / 2, np.pi / 2), line=dict(color='white', width=1), layer='below'))
+    else:
+        shapes += [
+            _pitch_line(45, 45, 55, 55, kind='circle'),
+            # Área izquierda (simétrica)
+            _pitch_line(0, 20, 15, 80, kind='rect'),
+            _pitch_line(0, 40, 8, 60, kind='rect'),
+            dict(type='path', path=_arc_path(10, 50, 10, np.pi - 0.6, np.pi + 0.6), line=dict(color='white', width=1), layer='below'),
+        ]
+    return go.layout.Template(layout=dict(
+        xaxis=dict(range=[x_min, 100], showgrid=False, zeroline=False, showticklabels=False),
         yaxis=dict(range=[0, 100], showgrid=False, zeroline=False, showticklabels=False, scaleanchor='x'),
-        width=width, height=height,
-        plot_bgcolor='#2b7a3a'
+        plot_bgcolor=PITCH_GREEN,
+        shapes=shapes,
+    ))
+
+
+def pitch_figure(width=700, height=450, half=False):
+    """Crea una figura base de cancha de fútbol con Plotly.
+
+    Args:
+        width, height: Tamaño de la figura.
+        half: Si True, solo la mitad de ataque del campo.
+    """
+    return go.Figure(layout=dict(template=pitch_template(half), width=width, height=height))
+
+
+# Modos del mapa de tiros según el número de tiros a dibujar
+SVG_MAX_SHOTS = 5_000
+WEBGL_MAX_SHOTS = 20_000
+DEFAULT_POINT_BUDGET = 5_000
+
+SCATTER_MODE_LABELS = {
+    'svg': 'SVG',
+    'webgl': 'WebGL',
+    'density': 'densidad + muestra',
+}
+
+
+def choose_scatter_mode(n_shots: int, mode: str = 'auto') -> str:
+    """Modo de render del mapa de tiros: 'svg', 'webgl' o 'density'."""
+    if mode != 'auto':
+        if mode not in SCATTER_MODE_LABELS:
+            raise ValueError(f"mode debe ser 'auto' o uno de {list(SCATTER_MODE_LABELS)}")
+        return mode
+    if n_shots <= SVG_MAX_SHOTS:
+        return 'svg'
+    if n_shots <= WEBGL_MAX_SHOTS:
+        return 'webgl'
+    return 'density'
+
+
+def stratified_shot_sample(d, point_budget: int, bins: int = 10, seed: int = 0):
+    """Muestra de tiros de tamaño acotado que conserva todos los goles.
+
+    Los no-goles se muestrean con la misma fracción en cada zona de una rejilla
+    ``bins x bins``, de modo que la muestra mantiene la distribución espacial.
+    """
+    from src.zones import zone_index
+
+    goals = d[d['is_goal'] == True]
+    non_goals = d[d['is_goal'] == False]
+    remaining = max(point_budget - len(goals), 0)
+    if len(non_goals) <= remaining:
+        return d
+    cells = zone_index(non_goals['y'], bins) * bins + zone_index(non_goals['x'], bins)
+    frac = remaining / len(non_goals)
+    sampled = non_goals.groupby(cells).sample(frac=frac, random_state=seed)
+    return pd.concat([sampled, goals])
+
+
+def _density_layer(grid: dict, opacity: float):
+    """Capa de densidad KDE calculada en el servidor (``src.zones.density_grid``)."""
+    density = grid['density']
+    peak = density.max()
+    # Las celdas casi vacías se dejan transparentes para que se vea el césped
+    z = np.where(density >= peak * 0.02, density, np.nan) if peak > 0 else np.full(density.shape, np.nan)
+    centers = (np.arange(grid['bins']) + 0.5) * (100 / grid['bins'])
+    return go.Contour(
+        x=centers, y=centers, z=z, colorscale='YlOrRd', showscale=False, opacity=opacity,
+        contours=dict(showlines=False, coloring='fill'), connectgaps=False,
+        hovertemplate='Densidad: %{z:.2f} tiros/celda<extra></extra>', name='Densidad'
     )
-    # Añadir marcas de cancha (línea central, área, etc.)
-    # Fondo/rectángulo principal (relleno con color césped)
-    fig.add_shape(type="rect", x0=0, y0=0, x1=100, y1=100, line=dict(color="white", width=2), fillcolor='#2b7a3a', layer='below')
-    # Línea de medio campo
-    fig.add_shape(type="line", x0=50, y0=0, x1=50, y1=100, line=dict(color="white", width=1), layer='below')
-    # Círculo central
-    fig.add_shape(type="circle", x0=45, y0=45, x1=55, y1=55, line=dict(color="white", width=1), layer='below')
-    # Áreas de gol (ambos extremos)
-    # Área derecha
-    fig.add_shape(type="rect", x0=85, y0=20, x1=100, y1=80, line=dict(color="white", width=1), layer='below')
-    fig.add_shape(type="rect", x0=92, y0=40, x1=100, y1=60, line=dict(color="white", width=1), layer='below')
-    # Área izquierda (simétrica)
-    fig.add_shape(type="rect", x0=0, y0=20, x1=15, y1=80, line=dict(color="white", width=1), layer='below')
-    fig.add_shape(type="rect", x0=0, y0=40, x1=8, y1=60, line=dict(color="white", width=1), layer='below')
-
-    # Penalty arcs en ambos extremos (simulados con líneas)
-    theta_right = np.linspace(-0.6, 0.6, 24)
-    arc_x_r = 90 + 10 * np.cos(theta_right)
-    arc_y_r = 50 + 10 * np.sin(theta_right)
-    fig.add_trace(go.Scatter(x=arc_x_r, y=arc_y_r, mode='lines', line=dict(color='white', width=1), showlegend=False))
-
-    theta_left = np.linspace(np.pi - 0.6, np.pi + 0.6, 24)
-    arc_x_l = 10 + 10 * np.cos(theta_left)
-    arc_y_l = 50 + 10 * np.sin(theta_left)
-    fig.add_trace(go.Scatter(x=arc_x_l, y=arc_y_l, mode='lines', line=dict(color='white', width=1), showlegend=False))
-    return fig
 
 
-def plot_shot_scatter(df, team=None):
-    """Gráfico de dispersión de tiros en la cancha."""
-    fig = pitch_figure(width=900, height=560)
+def _hover_template(d):
+    """Columnas de ``customdata`` y ``hovertemplate`` del mapa de tiros."""
+    columns = ['player', 'team']
+    lines = ['<b>Jugador:</b> %{customdata[0]}', '<b>Equipo:</b> %{customdata[1]}']
+    if 'minute' in d.columns:
+        lines.append(f'<b>Minuto:</b> %{{customdata[{len(columns)}]:.0f}}')
+        columns.append('minute')
+    lines.append('<b>Posición:</b> (%{x:.1f}, %{y:.1f})')
+    if 'xg' in d.columns:
+        lines.append(f'<b>xG:</b> %{{customdata[{len(columns)}]:.2f}}')
+        columns.append('xg')
+    return columns, '<br>'.join(lines) + '<extra></extra>'
+
+
+def plot_shot_scatter(df, team=None, mode='auto', point_budget=DEFAULT_POINT_BUDGET, half=False,
+                      density=None, bandwidth=None):
+    """Gráfico de dispersión de tiros en la cancha.
+
+    Args:
+        df: DataFrame con tiros.
+        team: Equipo a mostrar (None = todos).
+        mode: 'auto', 'svg', 'webgl' o 'density'. En 'auto' se usa SVG hasta
+            ``SVG_MAX_SHOTS`` tiros, WebGL (Scattergl) hasta ``WEBGL_MAX_SHOTS`` y,
+            por encima, una capa de densidad calculada en el servidor más una
+            muestra estratificada de ``point_budget`` tiros (con todos los goles).
+        point_budget: Máximo de tiros individuales dibujados en modo 'density'.
+        half: Si True, dibuja solo la mitad de ataque del campo.
+        density: Resultado de ``src.zones.density_grid`` para estos mismos tiros
+            (p. ej. memoizado por la app); si es None se calcula aquí.
+        bandwidth: Ancho del núcleo de la densidad, en unidades del campo.
+    """
+    from src.zones import DEFAULT_BANDWIDTH, density_grid
+
+    fig = pitch_figure(width=900, height=560, half=half)
     d = df.copy()
     if team:
         d = d[d["team"] == team]
@@ -54,125 +170,172 @@ def plot_shot_scatter(df, team=None):
     if 'x' not in d.columns or 'y' not in d.columns:
         raise ValueError('DataFrame must contain x and y columns for shot positions')
 
-    # Calculate distance to goal to size markers
     d = d.dropna(subset=['x', 'y']).copy()
+    n_shots = len(d)
+    mode = choose_scatter_mode(n_shots, mode)
+    if density is None:
+        density = density_grid(d, bandwidth=bandwidth or DEFAULT_BANDWIDTH)
+    if mode == 'density':
+        d = stratified_shot_sample(d, point_budget)
+        mode_note = f"{SCATTER_MODE_LABELS[mode]}: {len(d):,} de {n_shots:,} tiros"
+    else:
+        mode_note = f"{SCATTER_MODE_LABELS[mode]}: {n_shots:,} tiros"
+    scatter = go.Scatter if mode == 'svg' else go.Scattergl
+
+    # Calculate distance to goal to size markers
     d['distance_to_goal'] = np.sqrt((100 - d['x'])**2 + (50 - d['y'])**2)
     # size: closer => larger
     d['marker_size'] = np.clip(18 - (d['distance_to_goal'] / 6), 6, 20)
     d['opacity'] = np.clip(1 - (d['distance_to_goal'] / 200), 0.45, 0.95)
 
-    # Hover text: include available info
-    def make_hover(row):
-        parts = []
-        parts.append(f"<b>Jugador:</b> {row.get('player', 'N/A')}")
-        parts.append(f"<b>Equipo:</b> {row.get('team', 'N/A')}")
-        if 'minute' in row.index:
-            try:
-                parts.append(f"<b>Minuto:</b> {int(row['minute'])}")
-            except Exception:
-                parts.append(f"<b>Minuto:</b> {row['minute']}")
-        parts.append(f"<b>Posición:</b> ({row['x']:.1f}, {row['y']:.1f})")
-        if 'xg' in row.index:
-            try:
-                parts.append(f"<b>xG:</b> {row['xg']:.2f}")
-            except Exception:
-                parts.append(f"<b>xG:</b> {row['xg']}")
-        return '<br>'.join(parts)
-
-    d['hover_text'] = d.apply(make_hover, axis=1)
+    # Tooltips: Plotly formatea los campos de customdata en el navegador
+    hover_columns, hovertemplate = _hover_template(d)
+
+    def _hover_customdata(part):
+        return np.column_stack([
+            part[col].to_numpy(dtype=object) if col in part.columns else np.full(len(part), 'N/A', dtype=object)
+            for col in hover_columns
+        ])
 
     # Goals vs non-goals
     goals = d[d['is_goal'] == True]
     non_goals = d[d['is_goal'] == False]
 
+    # Densidad KDE del servidor: capa principal en modo 'density', sutil en el resto
+    fig.add_trace(_density_layer(density, opacity=0.55 if mode == 'density' else 0.25))
+
     # Plot non-goals with subtle color
-    fig.add_trace(go.Scatter(
+    fig.add_trace(scatter(
         x=non_goals['x'], y=non_goals['y'], mode='markers',
         marker=dict(size=non_goals['marker_size'], color='rgba(255,255,255,0.9)', line=dict(color='rgba(0,0,0,0.6)', width=1)),
-        hovertext=non_goals['hover_text'], hoverinfo='text',
+        customdata=_hover_customdata(non_goals), hovertemplate=hovertemplate,
         name='Tiro (No Gol)'
     ))
 
     # Plot goals with standout styling
-    fig.add_trace(go.Scatter(
+    fig.add_trace(scatter(
         x=goals['x'], y=goals['y'], mode='markers+text',
         marker=dict(size=goals['marker_size'] + 4, color='gold', line=dict(color='#ff7f50', width=2)),
         text=["⭐" for _ in range(len(goals))], textposition='top center',
-        hovertext=goals['hover_text'], hoverinfo='text',
+        customdata=_hover_customdata(goals), hovertemplate=hovertemplate,
         name='GOL'
     ))
 
-    # Add a subtle density layer (2D histogram contour)
-    try:
-        fig.add_trace(go.Histogram2dContour(
-            x=d['x'], y=d['y'], colorscale='YlOrRd', reversescale=False, showscale=False, contours=dict(showlines=False, coloring='fill'), opacity=0.25, hoverinfo='skip'
-        ))
-    except Exception:
-        pass
-
     # Layout improvements
+    title = f"Mapa de Tiros {'- ' + team if team else ''}<br><sup>Modo {mode_note}</sup>"
     fig.update_layout(
-        title=dict(text=f"Mapa de Tiros {'- ' + team if team else ''}", x=0.5, xanchor='center', font=dict(size=18, color='white')),
+        title=dict(text=title, x=0.5, xanchor='center', font=dict(size=18, color='white')),
         legend=dict(x=0.02, y=0.98, bgcolor='rgba(0,0,0,0)'),
         margin=dict(l=10, r=10, t=60, b=10),
         paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='#2b7a3a'
+        plot_bgcolor=PITCH_GREEN
     )
 
     # Tune axes to look like a pitch
-    fig.update_xaxes(range=[0, 100], showgrid=False, zeroline=False, visible=False)
+    fig.update_xaxes(range=[50 if half else 0, 100], showgrid=False, zeroline=False, visible=False)
     fig.update_yaxes(range=[0, 100], showgrid=False, zeroline=False, visible=False)
 
     return fig
 
 
-def plot_shot_heatmap(df, team=None, ax=None):
-    """Mapa de calor de densidad de tiros."""
-    d = df.copy()
-    if team:
-        d = d[d["team"] == team]
-    
-    x_bins = np.linspace(0, 100, 25)
-    y_bins = np.linspace(0, 100, 25)
-    heat, xedges, yedges = np.histogram2d(d['x'].dropna(), d['y'].dropna(), bins=[x_bins, y_bins])
-    heat = np.rot90(heat)
-    heat = np.flipud(heat)
-
-    fig, ax = plt.subplots(figsize=(7, 4.5))
-    sns.heatmap(heat, cmap='YlOrRd', ax=ax, cbar_kws={'label': 'Densidad de Tiros'})
-    ax.set_xticks([])
-    ax.set_yticks([])
-    ax.set_facecolor('green')
-    ax.set_title(f"Heatmap de Densidad {'- ' + team if team else ''}")
+def plot_grid_heatmap(matrix, title='', colorscale='YlOrRd', colorbar_title='', zmin=None, zmax=None,
+                      hover_label='Valor', hover_format='.1f', half=False):
+    """Heatmap de Plotly sobre la cancha a partir de una matriz densa.
+
+    Args:
+        matrix: Array ``[y_bin, x_bin]`` sobre la rejilla fija 0-100 (NaN = celda vacía).
+        title: Título de la figura.
+        colorscale, zmin, zmax: Escala de color.
+        colorbar_title: Etiqueta de la barra de color.
+        hover_label, hover_format: Nombre y formato del valor en el tooltip.
+        half: Si True, solo la mitad de ataque del campo.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    bins_y, bins_x = matrix.shape
+    fig = pitch_figure(width=800, height=520, half=half)
+    fig.add_trace(go.Heatmap(
+        x=(np.arange(bins_x) + 0.5) * (100 / bins_x),
+        y=(np.arange(bins_y) + 0.5) * (100 / bins_y),
+        z=matrix, colorscale=colorscale, zmin=zmin, zmax=zmax, opacity=0.85,
+        colorbar=dict(title=colorbar_title),
+        hovertemplate=f'Zona (%{{x:.0f}}, %{{y:.0f}})<br>{hover_label}: %{{z:{hover_format}}}<extra></extra>',
+    ))
+    fig.update_layout(
+        title=dict(text=title, x=0.5, xanchor='center'),
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
     return fig
 
 
-def plot_goal_zones_heatmap(df, bins=10):
-    """Mapa de calor de probabilidad de gol por zona."""
-    from src.data import identify_goal_zones
-    
-    zones = identify_goal_zones(df, bins=bins, min_shots=1)
-    
-    # Crear matriz de probabilidades
-    prob_matrix = np.zeros((bins, bins))
-    for _, row in zones.iterrows():
-        prob_matrix[int(row['y_bin']), int(row['x_bin'])] = row['goal_probability_%']
-    
-    fig, ax = plt.subplots(figsize=(8, 5))
-    sns.heatmap(prob_matrix, cmap='RdYlGn', ax=ax, cbar_kws={'label': 'Probabilidad de Gol (%)'}, 
-                vmin=0, vmax=100)
-    ax.set_xticks([])
-    ax.set_yticks([])
-    ax.set_facecolor('green')
-    ax.set_title("Zonas del Campo con Mayor Probabilidad de Gol")
-    return fig
+def plot_shot_heatmap(df, team=None, bins=24):
+    """Mapa de calor de densidad de tiros."""
+    from src.zones import zone_grid
 
+    d = df[df['team'] == team] if team else df
+    grid = zone_grid(d, bins=bins)
+    density = np.where(grid['shots'] > 0, grid['shots'], np.nan)
+    return plot_grid_heatmap(
+        density, title=f"Heatmap de Densidad {'- ' + team if team else ''}",
+        colorscale='YlOrRd', colorbar_title='Densidad de Tiros',
+        hover_label='Tiros', hover_format='.0f'
+    )
 
-def plot_efficiency_comparison(df, group_by='team'):
-    """Gráfico comparativo de eficacia entre equipos/jugadores."""
+
+def plot_goal_zones_heatmap(df, bins=10, min_shots=1, matrices=None):
+    """Mapa de calor de probabilidad de gol por zona.
+
+    Args:
+        df: DataFrame con tiros (no se usa si se pasa ``matrices``).
+        bins: Número de divisiones del campo por lado.
+        min_shots: Zonas con menos tiros se muestran vacías.
+        matrices: Resultado de ``goal_zone_matrices`` ya calculado.
+    """
+    if matrices is None:
+        from src.data import goal_zone_matrices
+        matrices = goal_zone_matrices(df, bins=bins, min_shots=min_shots)
+
+    return plot_grid_heatmap(
+        matrices['probability'], title="Zonas del Campo con Mayor Probabilidad de Gol",
+        colorscale='RdYlGn', colorbar_title='Probabilidad de Gol (%)', zmin=0, zmax=100,
+        hover_label='Probabilidad de gol', hover_format='.1f'
+    )
+
+
+STATS_COLUMNS = ('goals', 'total_shots', 'efficiency_%')
+
+
+def is_stats_frame(data, group_by: str) -> bool:
+    """True si ``data`` ya es una tabla agregada por ``group_by``.
+
+    Una tabla de estadísticas tiene la columna ``group_by`` más ``goals``,
+    ``total_shots`` y ``efficiency_%`` (p. ej. ``get_stats_with_overrides``).
+    """
+    return (
+        isinstance(data, pd.DataFrame)
+        and 'is_goal' not in data.columns
+        and all(col in data.columns for col in (group_by,) + STATS_COLUMNS)
+    )
+
+
+def _stats_frame(data, group_by: str) -> pd.DataFrame:
+    """Estadísticas por ``group_by``: la tabla recibida o agregadas desde los tiros/cubo."""
+    if is_stats_frame(data, group_by):
+        return data
     from src.data import calculate_shooting_efficiency
-    
-    efficiency = calculate_shooting_efficiency(df, group_by=group_by)
+    return calculate_shooting_efficiency(data, group_by=group_by)
+
+
+def plot_efficiency_comparison(df, group_by='team'):
+    """Gráfico comparativo de eficacia entre equipos/jugadores.
+
+    Args:
+        df: Tabla de estadísticas ya agregada por ``group_by`` (solo se dibuja),
+            o tiros / ``ShotCube`` (se agregan con ``calculate_shooting_efficiency``).
+        group_by: Columna de agrupación.
+    """
+    import plotly.express as px
+
+    efficiency = _stats_frame(df, group_by)
     
     fig = px.bar(
         efficiency,
@@ -189,10 +352,13 @@ def plot_efficiency_comparison(df, group_by='team'):
 
 
 def plot_shots_vs_goals(df, group_by='team'):
-    """Gráfico de tiros totales vs goles por grupo."""
-    from src.data import calculate_shooting_efficiency
-    
-    efficiency = calculate_shooting_efficiency(df, group_by=group_by)
+    """Gráfico de tiros totales vs goles por grupo.
+
+    Args:
+        df: Tabla de estadísticas ya agregada por ``group_by``, o tiros / ``ShotCube``.
+        group_by: Columna de agrupación.
+    """
+    efficiency = _stats_frame(df, group_by)
     
     fig = go.Figure(data=[
         go.Bar(name='Total Tiros', x=efficiency[group_by], y=efficiency['total_shots'], marker_color='lightblue'),
@@ -208,10 +374,16 @@ def plot_shots_vs_goals(df, group_by='team'):
 
 
 def plot_top_performers(df, metric='goals', top_n=10):
-    """Gráfico de top jugadores/equipos por métrica."""
-    from src.data import calculate_shooting_efficiency
-    
-    efficiency = calculate_shooting_efficiency(df, group_by='player')
+    """Gráfico de top jugadores/equipos por métrica.
+
+    Args:
+        df: Tabla de estadísticas por jugador, o tiros / ``ShotCube``.
+        metric: Columna por la que ordenar.
+        top_n: Número de jugadores a mostrar.
+    """
+    import plotly.express as px
+
+    efficiency = _stats_frame(df, 'player')
     top_players = efficiency.nlargest(top_n, metric)
     
     fig = px.bar(
@@ -0,0 +1,277 @@
+"""Motor de zonas sobre la rejilla fija del campo.
+
+Las coordenadas (escala 0-100) se asignan a celdas de una rejilla
+``bins x bins`` con bordes fijos en múltiplos de ``100 / bins``, de modo que
+las zonas son comparables entre equipos, temporadas y filtros. Los conteos se
+obtienen en una pasada con ``np.bincount`` sobre el índice plano de celda.
+
+Las matrices densas se indexan ``[y_bin, x_bin]``.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+PITCH_SIZE = 100
+
+
+def zone_index(values, bins: int) -> np.ndarray:
+    """Celda (0..bins-1) de cada coordenada sobre la rejilla fija 0-100."""
+    values = np.asarray(values, dtype=np.float64)
+    cells = (values * bins // PITCH_SIZE).astype(np.intp)
+    return np.clip(cells, 0, bins - 1)
+
+
+def zone_counts(x, y, is_goal, bins: int):
+    """Tiros y goles por celda en matrices densas ``bins x bins``.
+
+    Args:
+        x, y: Coordenadas sin nulos.
+        is_goal: Booleanos alineados con x/y.
+        bins: Divisiones por lado.
+
+    Returns:
+        (shots, goals) como arrays int64 indexados ``[y_bin, x_bin]``.
+    """
+    flat = zone_index(y, bins) * bins + zone_index(x, bins)
+    size = bins * bins
+    shots = np.bincount(flat, minlength=size).reshape(bins, bins)
+    goals = np.bincount(flat[np.asarray(is_goal, dtype=bool)], minlength=size).reshape(bins, bins)
+    return shots.astype(np.int64), goals.astype(np.int64)
+
+
+def zone_grid(df: pd.DataFrame, bins: int = 10) -> dict:
+    """Conteos densos de tiros y goles de un DataFrame de tiros.
+
+    Returns:
+        {'bins': int, 'shots': ndarray, 'goals': ndarray}
+    """
+    # Arrays por columna: evita materializar un sub-DataFrame en cada llamada
+    x = df['x'].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df['y'].to_numpy(dtype=np.float64, na_value=np.nan)
+    is_goal = df['is_goal'].to_numpy()
+    valid = ~(np.isnan(x) | np.isnan(y) | pd.isna(is_goal))
+    shots, goals = zone_counts(x[valid], y[valid], is_goal[valid].astype(bool), bins)
+    return {'bins': bins, 'shots': shots, 'goals': goals}
+
+
+def zone_matrices(grid: dict, min_shots: int = 1) -> dict:
+    """Matrices densas de tiros, goles y probabilidad de gol de una rejilla.
+
+    La probabilidad (en %, redondeada a 2 decimales) se calcula en una sola
+    operación sobre toda la matriz; las celdas con menos de ``min_shots``
+    tiros quedan en NaN.
+
+    Returns:
+        {'bins', 'min_shots', 'shots', 'goals', 'probability'} indexados ``[y_bin, x_bin]``.
+    """
+    shots, goals = grid['shots'], grid['goals']
+    enough = shots >= max(min_shots, 1)
+    probability = np.full(shots.shape, np.nan)
+    np.divide(goals * 100, shots, out=probability, where=enough)
+    return {
+        'bins': grid['bins'],
+        'min_shots': min_shots,
+        'shots': shots,
+        'goals': goals,
+        'probability': np.round(probability, 2),
+    }
+
+
+def zones_frame(grid: dict, min_shots: int = 1) -> pd.DataFrame:
+    """Formato largo de una rejilla, con las columnas de ``identify_goal_zones``."""
+    shots, goals = grid['shots'], grid['goals']
+    y_bin, x_bin = np.nonzero(shots)
+    order = np.lexsort((y_bin, x_bin))
+    y_bin, x_bin = y_bin[order], x_bin[order]
+    zones = pd.DataFrame({
+        'x_bin': x_bin,
+        'y_bin': y_bin,
+        'goals': goals[y_bin, x_bin],
+        'total_shots': shots[y_bin, x_bin],
+    })
+    zones = zones[zones['total_shots'] >= min_shots]
+    zones['goal_probability_%'] = (zones['goals'] / zones['total_shots'] * 100).round(2)
+    zones = zones.sort_values('goal_probability_%', ascending=False)
+    return zones
+
+
+# ------------------ Pirámide de resoluciones y tablas de suma ------------------
+PYRAMID_RESOLUTIONS = (5, 10, 20, 40)
+
+# Regiones de interés (x0, x1, y0, y1) en la escala 0-100, atacando hacia x=100
+PITCH_REGIONS = {
+    'area': (85, 100, 20, 80),
+    'area_chica': (92.5, 100, 40, 60),
+    'zona_14': (70, 85, 35, 65),
+    'carril_interior_superior': (70, 100, 20, 35),
+    'carril_interior_inferior': (70, 100, 65, 80),
+    'ultimo_tercio': (66.7, 100, 0, 100),
+}
+
+
+def _summed_area(matrix: np.ndarray) -> np.ndarray:
+    """Tabla de suma acumulada con una fila/columna de ceros delante."""
+    sat = np.zeros((matrix.shape[0] + 1, matrix.shape[1] + 1), dtype=np.int64)
+    sat[1:, 1:] = matrix.cumsum(axis=0).cumsum(axis=1)
+    return sat
+
+
+def build_zone_pyramid(df: pd.DataFrame, resolutions=PYRAMID_RESOLUTIONS) -> dict:
+    """Rejillas de zonas a varias resoluciones más sus tablas de suma (SAT).
+
+    Los tiros se binean una sola vez a la resolución más fina; el resto de
+    niveles se obtienen sumando bloques, por lo que todas las resoluciones
+    deben dividir a la más fina.
+
+    Args:
+        df: DataFrame con tiros (x, y, is_goal).
+        resolutions: Divisiones por lado de cada nivel.
+
+    Returns:
+        {'resolutions': tuple, 'levels': {bins: {'bins', 'shots', 'goals', 'sat_shots', 'sat_goals'}}}
+    """
+    resolutions = tuple(sorted(resolutions))
+    finest = resolutions[-1]
+    if any(finest % res for res in resolutions):
+        raise ValueError(f'Cada resolución debe dividir a {finest}: {resolutions}')
+
+    base = zone_grid(df, bins=finest)
+    levels = {}
+    for res in resolutions:
+        factor = finest // res
+        shots = base['shots'].reshape(res, factor, res, factor).sum(axis=(1, 3))
+        goals = base['goals'].reshape(res, factor, res, factor).sum(axis=(1, 3))
+        levels[res] = {
+            'bins': res,
+            'shots': shots,
+            'goals': goals,
+            'sat_shots': _summed_area(shots),
+            'sat_goals': _summed_area(goals),
+        }
+    return {'resolutions': resolutions, 'levels': levels}
+
+
+def pyramid_level(pyramid: dict, bins: int):
+    """Rejilla ``{'bins', 'shots', 'goals'}`` del nivel ``bins`` de la pirámide.
+
+    Es idéntica a ``zone_grid(df, bins)``: los bordes de la rejilla fina caen
+    sobre los de cada nivel. Devuelve None si ``bins`` no es un nivel.
+    """
+    level = pyramid['levels'].get(bins)
+    if level is None:
+        return None
+    return {'bins': bins, 'shots': level['shots'], 'goals': level['goals']}
+
+
+def _rect_sum(sat: np.ndarray, i0: int, i1: int, j0: int, j1: int) -> int:
+    """Suma de las celdas [i0:i1, j0:j1] con cuatro accesos a la SAT."""
+    return int(sat[i1, j1] - sat[i0, j1] - sat[i1, j0] + sat[i0, j0])
+
+
+def region_stats(pyramid: dict, x0: float, x1: float, y0: float, y1: float) -> dict:
+    """Tiros, goles y probabilidad dentro de un rectángulo del campo en O(1).
+
+    El rectángulo se ajusta a las líneas de la rejilla más fina de la pirámide
+    (celdas de ``100 / bins`` unidades); ``bounds`` devuelve el rectángulo usado.
+
+    Returns:
+        {'shots', 'goals', 'goal_probability_%', 'bins', 'bounds'}
+    """
+    bins = pyramid['resolutions'][-1]
+    level = pyramid['levels'][bins]
+    cell = PITCH_SIZE / bins
+
+    def snap(value):
+        return int(np.clip(round(value / cell), 0, bins))
+
+    j0, j1 = sorted((snap(x0), snap(x1)))
+    i0, i1 = sorted((snap(y0), snap(y1)))
+    shots = _rect_sum(level['sat_shots'], i0, i1, j0, j1)
+    goals = _rect_sum(level['sat_goals'], i0, i1, j0, j1)
+    probability = round(goals / shots * 100, 2) if shots > 0 else 0.0
+    return {
+        'shots': shots,
+        'goals': goals,
+        'goal_probability_%': probability,
+        'bins': bins,
+        'bounds': (j0 * cell, j1 * cell, i0 * cell, i1 * cell),
+    }
+
+
+# ------------------ Densidad de tiros (KDE por FFT) ------------------
+DENSITY_BINS = 100
+DEFAULT_BANDWIDTH = 4.0
+
+
+@lru_cache(maxsize=32)
+def _kernel_spectrum(shape: tuple, radius: int, sigma: float) -> np.ndarray:
+    """Transformada (rfft2) del núcleo gaussiano normalizado, centrado en (0, 0).
+
+    El núcleo se trunca a ``radius`` celdas para que la convolución circular no
+    mezcle bordes opuestos (el relleno es de ``radius`` celdas).
+    """
+    offsets = [np.minimum(np.arange(n), n - np.arange(n)) for n in shape]
+    kernel = np.exp(-0.5 * (offsets[0][:, None] ** 2 + offsets[1][None, :] ** 2) / sigma ** 2)
+    kernel[(offsets[0][:, None] > radius) | (offsets[1][None, :] > radius)] = 0
+    spectrum = np.fft.rfft2(kernel / kernel.sum())
+    spectrum.flags.writeable = False
+    return spectrum
+
+
+def shot_density(x, y, bins: int = DENSITY_BINS, bandwidth: float = DEFAULT_BANDWIDTH) -> np.ndarray:
+    """Densidad de tiros suavizada con un núcleo gaussiano (KDE sobre la rejilla fija).
+
+    Los tiros se binean una vez con ``np.bincount`` y la rejilla se convoluciona
+    con el núcleo mediante FFT; el coste depende de ``bins`` y no del número de
+    tiros. La rejilla se rellena con ceros (``3 * sigma``) para que la masa que
+    sale por un borde no reaparezca por el opuesto.
+
+    Args:
+        x, y: Coordenadas sin nulos (escala 0-100).
+        bins: Celdas por lado de la rejilla.
+        bandwidth: Desviación típica del núcleo, en unidades del campo.
+
+    Returns:
+        Array ``[y_bin, x_bin]`` con tiros esperados por celda (suma ≈ nº de tiros).
+    """
+    flat = zone_index(y, bins) * bins + zone_index(x, bins)
+    counts = np.bincount(flat, minlength=bins * bins).reshape(bins, bins).astype(np.float64)
+    if bandwidth <= 0:
+        return counts
+    sigma = bandwidth / (PITCH_SIZE / bins)
+    pad = int(np.ceil(3 * sigma))
+    shape = (bins + pad, bins + pad)
+    smoothed = np.fft.irfft2(np.fft.rfft2(counts, s=shape) * _kernel_spectrum(shape, pad, float(sigma)), s=shape)
+    return np.clip(smoothed[:bins, :bins], 0, None)
+
+
+def density_grid(df: pd.DataFrame, bins: int = DENSITY_BINS, bandwidth: float = DEFAULT_BANDWIDTH) -> dict:
+    """Densidad de tiros de un DataFrame, lista para dibujar o consultar.
+
+    Returns:
+        {'bins', 'bandwidth', 'shots', 'density'}; ``density`` indexado ``[y_bin, x_bin]``.
+    """
+    x = df['x'].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df['y'].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    return {
+        'bins': bins,
+        'bandwidth': bandwidth,
+        'shots': int(valid.sum()),
+        'density': shot_density(x[valid], y[valid], bins=bins, bandwidth=bandwidth),
+    }
+
+
+def density_at(grid: dict, x, y) -> np.ndarray:
+    """Densidad (tiros esperados por celda) en las coordenadas dadas."""
+    bins = grid['bins']
+    return grid['density'][zone_index(y, bins), zone_index(x, bins)]
+
+
+def density_peak(grid: dict) -> dict:
+    """Centro de la celda con mayor densidad y su valor."""
+    bins = grid['bins']
+    i, j = np.unravel_index(np.argmax(grid['density']), grid['density'].shape)
+    cell = PITCH_SIZE / bins
+    return {'x': (j + 0.5) * cell, 'y': (i + 0.5) * cell, 'density': float(grid['density'][i, j])}